@@ -11,9 +11,31 @@ from apps.groups.routing import websocket_urlpatterns as chat_wb
 from apps.transcription_notes.routing import websocket_urlpatterns as live_transcription_ws
 from apps.chat_bot.routing import websocket_urlpatterns as chat_bot_ws
 from apps.accounts.middleware import JWTAuthMiddleware
+from apps.transcription_notes.middleware import UploadSizeLimitMiddleware
+from apps.transcription_notes.model_pool import get_pool
+from apps.chat_bot.http_client import close_all_sessions
+
+# Load the Whisper replicas before the first live socket connects
+get_pool().start()
+
+
+async def lifespan(scope, receive, send):
+    """ Releases pooled outbound connections on shutdown (servers that send lifespan events, e.g. uvicorn). """
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await close_all_sessions()
+            get_pool().shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
 
 application = ProtocolTypeRouter({
-    "http": django_asgi_app,
+    # Oversized uploads are refused before Django spools the body to disk
+    "http": UploadSizeLimitMiddleware(django_asgi_app),
+    "lifespan": lifespan,
     "websocket": AllowedHostsOriginValidator(
         JWTAuthMiddleware(
             URLRouter(chat_wb + live_transcription_ws + chat_bot_ws)
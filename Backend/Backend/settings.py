@@ -305,4 +305,106 @@ RZP_KEY_SECRET=config('RZP_KEY_SECRET')
 CELERY_BROKER_URL = "redis://127.0.0.1:6379/0"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
-CELERY_RESULT_BACKEND = "django-db"
\ No newline at end of file
+CELERY_RESULT_BACKEND = "django-db"
+
+# Upload transcription scheduling. With TRANSCRIPTION_DEDICATED_QUEUES jobs are routed to
+# transcribe_{paid,free}_{short,long} and need workers started with -Q (see README);
+# otherwise they run on the default queue.
+TRANSCRIPTION_DEDICATED_QUEUES = config("TRANSCRIPTION_DEDICATED_QUEUES", default=False, cast=bool)
+TRANSCRIPTION_LONG_UPLOAD_SIZE = config("TRANSCRIPTION_LONG_UPLOAD_SIZE", default=25 * 1024 * 1024, cast=int)
+TRANSCRIPTION_MAX_IN_FLIGHT = config("TRANSCRIPTION_MAX_IN_FLIGHT", default=8, cast=int)
+TRANSCRIPTION_USER_CONCURRENCY = config("TRANSCRIPTION_USER_CONCURRENCY", default=2, cast=int)
+TRANSCRIPTION_PAID_WEIGHT = config("TRANSCRIPTION_PAID_WEIGHT", default=3, cast=int)
+TRANSCRIPTION_JOB_TIMEOUT = config("TRANSCRIPTION_JOB_TIMEOUT", default=3 * 60 * 60, cast=int)
+
+CELERY_BEAT_SCHEDULE = {
+    "dispatch-transcriptions": {
+        "task": "apps.transcription_notes.tasks.dispatch_transcriptions",
+        "schedule": 30.0,
+    },
+    "expire-upload-sessions": {
+        "task": "apps.transcription_notes.tasks.expire_upload_sessions",
+        "schedule": 60 * 60.0,
+    },
+}
+
+# Outbound Gemini HTTP: one keep-alive pool per process (per event loop)
+GEMINI_HTTP_POOL_LIMIT = config("GEMINI_HTTP_POOL_LIMIT", default=100, cast=int)
+GEMINI_HTTP_POOL_LIMIT_PER_HOST = config("GEMINI_HTTP_POOL_LIMIT_PER_HOST", default=20, cast=int)
+GEMINI_HTTP_KEEPALIVE = config("GEMINI_HTTP_KEEPALIVE", default=60, cast=float)
+GEMINI_HTTP_TIMEOUT = config("GEMINI_HTTP_TIMEOUT", default=60, cast=float)
+
+# Client-side Gemini quota governor; set from the project's Gemini rate limits
+GEMINI_REQUESTS_PER_MINUTE = config("GEMINI_REQUESTS_PER_MINUTE", default=300, cast=int)
+GEMINI_BURST = config("GEMINI_BURST", default=20, cast=int)
+GEMINI_MAX_CONCURRENT = config("GEMINI_MAX_CONCURRENT", default=16, cast=int)
+# Retries on 429/5xx back off exponentially with jitter (or per Retry-After), within the wait budget
+GEMINI_MAX_RETRIES = config("GEMINI_MAX_RETRIES", default=4, cast=int)
+GEMINI_BACKOFF_BASE = config("GEMINI_BACKOFF_BASE", default=0.5, cast=float)
+GEMINI_BACKOFF_MAX = config("GEMINI_BACKOFF_MAX", default=8.0, cast=float)
+GEMINI_MAX_WAIT = config("GEMINI_MAX_WAIT", default=30.0, cast=float)
+GEMINI_BACKGROUND_MAX_WAIT = config("GEMINI_BACKGROUND_MAX_WAIT", default=180.0, cast=float)
+
+# Note-grounded chat: notes longer than CHAT_CONTEXT_FULL_CHARS are cut into ~CHAT_CONTEXT_CHUNK_WORDS
+# word chunks and only the CHAT_CONTEXT_TOP_K best BM25 matches for the question are sent
+CHAT_CONTEXT_FULL_CHARS = config("CHAT_CONTEXT_FULL_CHARS", default=6000, cast=int)
+CHAT_CONTEXT_CHUNK_WORDS = config("CHAT_CONTEXT_CHUNK_WORDS", default=180, cast=int)
+CHAT_CONTEXT_TOP_K = config("CHAT_CONTEXT_TOP_K", default=4, cast=int)
+
+# Chat memory: past turns replayed into each prompt within CHAT_MEMORY_TOKEN_BUDGET (estimated tokens).
+# Older turns are folded into a rolling summary by a Celery job, keeping the newest
+# CHAT_MEMORY_RECENT_TOKENS verbatim.
+CHAT_MEMORY_TOKEN_BUDGET = config("CHAT_MEMORY_TOKEN_BUDGET", default=1500, cast=int)
+CHAT_MEMORY_RECENT_TOKENS = config("CHAT_MEMORY_RECENT_TOKENS", default=600, cast=int)
+CHAT_MEMORY_MAX_TURNS = config("CHAT_MEMORY_MAX_TURNS", default=10, cast=int)
+CHAT_MEMORY_SUMMARY_WORDS = config("CHAT_MEMORY_SUMMARY_WORDS", default=200, cast=int)
+
+# Chat credit history rows are buffered and bulk-inserted
+CREDIT_HISTORY_BATCH_SIZE = config("CREDIT_HISTORY_BATCH_SIZE", default=20, cast=int)
+CREDIT_HISTORY_FLUSH_SECONDS = config("CREDIT_HISTORY_FLUSH_SECONDS", default=10, cast=int)
+
+# Gemini reply cache (chat bot and note enhancement). Hits skip the API call and the credit charge.
+RESPONSE_CACHE_ENABLED = config("RESPONSE_CACHE_ENABLED", default=True, cast=bool)
+RESPONSE_CACHE_REDIS_URL = config("RESPONSE_CACHE_REDIS_URL", default="redis://127.0.0.1:6379/1")
+RESPONSE_CACHE_TTL = config("RESPONSE_CACHE_TTL", default=7 * 24 * 60 * 60, cast=int)
+RESPONSE_CACHE_MAX_ENTRIES = config("RESPONSE_CACHE_MAX_ENTRIES", default=20000, cast=int)
+# Paraphrase matching on local CPU embeddings; needs sentence-transformers
+RESPONSE_CACHE_SEMANTIC = config("RESPONSE_CACHE_SEMANTIC", default=False, cast=bool)
+RESPONSE_CACHE_EMBEDDING_MODEL = config("RESPONSE_CACHE_EMBEDDING_MODEL", default="all-MiniLM-L6-v2")
+RESPONSE_CACHE_SIMILARITY = config("RESPONSE_CACHE_SIMILARITY", default=0.92, cast=float)
+
+# Note enhancement runs as a Celery job; long transcripts are split and sent to Gemini concurrently
+ENHANCE_CHUNK_CHARS = config("ENHANCE_CHUNK_CHARS", default=8000, cast=int)
+ENHANCE_PARALLEL_CHUNKS = config("ENHANCE_PARALLEL_CHUNKS", default=4, cast=int)
+ENHANCE_MAX_ACTIVE = config("ENHANCE_MAX_ACTIVE", default=2, cast=int)
+# Jobs still unfinished after this are given up as failed (lost worker, broker down)
+ENHANCE_JOB_TIMEOUT = config("ENHANCE_JOB_TIMEOUT", default=15 * 60, cast=int)
+
+# Uploads over this are cut off while streaming, before they are fully received
+TRANSCRIPTION_MAX_UPLOAD_SIZE = config("TRANSCRIPTION_MAX_UPLOAD_SIZE", default=100 * 1024 * 1024, cast=int)
+# Resumable upload sessions (and stray partial files) older than this are deleted by beat
+TRANSCRIPTION_UPLOAD_SESSION_TTL = config("TRANSCRIPTION_UPLOAD_SESSION_TTL", default=24 * 60 * 60, cast=int)
+
+# Inference backend for live and upload transcription: "whisper" (PyTorch),
+# "faster-whisper" (CTranslate2) or "onnx" (ONNX Runtime via optimum).
+TRANSCRIPTION_ENGINE = config("TRANSCRIPTION_ENGINE", default="whisper")
+# int8 / int8_float32 / float32 for faster-whisper on CPU; float16 enables fp16 for whisper on GPU
+WHISPER_COMPUTE_TYPE = config("WHISPER_COMPUTE_TYPE", default="int8")
+# 0 lets CTranslate2 pick; set it to cores / WHISPER_POOL_SIZE so replicas don't oversubscribe
+WHISPER_CPU_THREADS = config("WHISPER_CPU_THREADS", default=0, cast=int)
+# Exported (and optionally quantized) ONNX model directory; empty exports openai/whisper-<model> on load
+WHISPER_ONNX_PATH = config("WHISPER_ONNX_PATH", default="")
+
+# Engine replicas shared by every live transcription socket in this process
+WHISPER_MODEL = config("WHISPER_MODEL", default="tiny")
+WHISPER_DEVICE = config("WHISPER_DEVICE", default="cpu")
+# Models kept in memory per process (live pool replica or Celery worker)
+WHISPER_REGISTRY_SIZE = config("WHISPER_REGISTRY_SIZE", default=2, cast=int)
+WHISPER_POOL_SIZE = config("WHISPER_POOL_SIZE", default=2, cast=int)
+WHISPER_POOL_QUEUE = config("WHISPER_POOL_QUEUE", default=8, cast=int)
+WHISPER_BATCH_SIZE = config("WHISPER_BATCH_SIZE", default=8, cast=int)
+WHISPER_BATCH_TICK_MS = config("WHISPER_BATCH_TICK_MS", default=100, cast=int)
+# Live update cadence per socket, in seconds; widens while scheduler latency is above target
+LIVE_UPDATE_MIN_INTERVAL = config("LIVE_UPDATE_MIN_INTERVAL", default=1.0, cast=float)
+LIVE_UPDATE_MAX_INTERVAL = config("LIVE_UPDATE_MAX_INTERVAL", default=8.0, cast=float)
+LIVE_UPDATE_TARGET_LATENCY = config("LIVE_UPDATE_TARGET_LATENCY", default=1.0, cast=float)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import adminLoginView, GetUsers, CreateUser, EditUser, DeleteUser, WalletDetailView, PomodoroView, AdminGroupView, AdminGroupDeleteView, AdminHabitView, AdminFetchNotesView, AdminLiveTranscriptionView, AdminChatBotView, AdminUploadTranscriptionView, AdminNotificationView, AdminDashboardStatsView, AdminCreditUsageListView, AdminRecentPurchasesListView, AdminSubscriptionStatsView
+from .views import adminLoginView, GetUsers, CreateUser, EditUser, DeleteUser, WalletDetailView, PomodoroView, AdminGroupView, AdminGroupDeleteView, AdminHabitView, AdminFetchNotesView, AdminLiveTranscriptionView, AdminChatBotView, AdminUploadTranscriptionView, AdminTranscriptionQueueView, AdminGeminiClientView, AdminNotificationView, AdminDashboardStatsView, AdminCreditUsageListView, AdminRecentPurchasesListView, AdminSubscriptionStatsView
 
 urlpatterns = [
     path('login/',adminLoginView.as_view(),name='adminLogin'),
@@ -15,7 +15,9 @@ urlpatterns = [
     path('notes/', AdminFetchNotesView.as_view(), name="fetch-all-notes"),
     path('live-transcription/', AdminLiveTranscriptionView.as_view(), name="fetch-all-live-transcriptions"),
     path('upload-transcription/', AdminUploadTranscriptionView.as_view(), name="fetch-all-upload-transcriptions"),
+    path('transcription-queues/', AdminTranscriptionQueueView.as_view(), name="transcription-queue-stats"),
     path('chat-bot/', AdminChatBotView.as_view(), name="fetch-all-chat-bot"),
+    path('gemini-client/', AdminGeminiClientView.as_view(), name="gemini-client-stats"),
     path('notifications/', AdminNotificationView.as_view(), name="fetch-all-notificaion"),
     path('credit-usage/', AdminCreditUsageListView.as_view(), name="fetch-all-credit-usage"),
     path('credit-purchases/', AdminRecentPurchasesListView.as_view(), name='admin-recent-purchases'),
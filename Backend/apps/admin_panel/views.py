@@ -13,7 +13,9 @@ from apps.pomodoro.models import PomodoroSession, PomodoroDailySummary
 from apps.habit_tracker.models import Habit, HabitLog
 from apps.groups.models import Group
 from apps.transcription_notes.models import Notes, LiveTranscription, UploadTranscription
+from apps.transcription_notes.dispatch import queue_stats
 from apps.chat_bot.models import ChatBot, ChatBotMessage
+from apps.chat_bot.http_client import client_stats
 from apps.subscriptions.models import CreditPurchase, CreditUsageHistory
 
 from django.contrib.auth import login
@@ -290,6 +292,19 @@ class AdminUploadTranscriptionView(APIView):
         serializer = AdminUploadStatsSerializer(users_data, many=True)
         return Response({"users": serializer.data})
     
+class AdminTranscriptionQueueView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(queue_stats())
+
+class AdminGeminiClientView(APIView):
+    """ Connection reuse and latency of outbound Gemini calls made by this process. """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(client_stats())
+
 class AdminNotificationView(APIView):
     permission_classes = [IsAuthenticated]
 
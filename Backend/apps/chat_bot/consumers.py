@@ -2,15 +2,21 @@ import json
 from django.utils import timezone
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
-from .models import ChatBot, ChatBotMessage
-from .gemini_service import call_gemini
-from apps.accounts.models import UserCredits
-from apps.subscriptions.models import CreditUsageHistory
+from .models import ChatBotMessage
+from . import quota, memory
+from .tasks import summarize_conversation
+from .gemini_service import stream_gemini, GeminiError
+from .response_cache import ResponseCache
+from .retrieval import select_context
+from apps.transcription_notes.models import Notes
 from django.db import models
+from django.core.exceptions import ValidationError
 import logging
 
 logger = logging.getLogger(__name__)
 
+chat_cache = ResponseCache("chat", semantic=True)
+
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.user = self.scope["user"]
@@ -18,8 +24,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if not self.user.is_authenticated:
             await self.close()
             return
+        # (date, ChatBot id) of today's counter row, looked up once per day per socket
+        self.chatbot_day = None
         await self.accept()
 
+    async def disconnect(self, close_code):
+        await sync_to_async(quota.flush_usage)()
+
     async def receive(self, text_data):
         try:
             data = json.loads(text_data)
@@ -27,85 +38,131 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return
 
         message = data.get("message", "").strip()
+        note_id = data.get("note_id")
         context = data.get("context", "")
         note_title = data.get("note_title", "")
 
         if not message:
             return
+
+        # The note is read here rather than uploaded with every message
+        if note_id:
+            note = await self.get_note(note_id)
+            if note is None:
+                await self.send(text_data=json.dumps({
+                    "type": "error",
+                    "message": "Note not found"
+                }))
+                return
+            note_title, context = note
+
+        # Each note has its own conversation, and general chat another
+        conversation = str(note_id) if note_id else ""
+        summary, turns, overflowed = await sync_to_async(memory.load_history)(self.user, conversation)
+        # The cache is shared by every user, so only answers given without this user's
+        # conversation in the prompt (its first question) may be read from or written to it
+        history = memory.format_history(summary, turns)
+        cacheable = not history
+
+        # Same question on the same note: answer from cache, free of charge
+        cache_context = f"{note_title}\n{context}" if context else ""
+        cached = await chat_cache.get(message, cache_context) if cacheable else None
+        if cached is not None:
+            await self.save_cached_reply(message, cached, conversation)
+            await self.send(text_data=json.dumps({
+                "type": "final",
+                "reply": cached,
+                "mode": "cached"
+            }))
+            return
         
-        check_result = await self.check_can_ask()
-        
-        if not check_result['allowed']:
+        mode = await self.reserve()
+        chatbot_id = self.chatbot_day[1]
+
+        if mode is None:
             await self.send(text_data=json.dumps({
                 "type": "limit_reached",
                 "message": "Daily limit reached. Please purchase credits."
             }))
             return
 
-        prompt = f"Note: {note_title}\nContext: {context}\nQuestion: {message}" if context else message
+        # Only the parts of a long note that bear on the question go into the prompt
+        excerpt = await sync_to_async(select_context)(note_id or "inline", context, message) if context else ""
+        prompt = f"Note: {note_title}\nContext: {excerpt}\nQuestion: {message}" if excerpt else message
+        # Summary plus the newest turns that fit the token budget, so the prompt stays bounded
+        if history:
+            prompt = f"{history}\n\n{prompt}"
         logger.info(f"Sending prompt to AI: {prompt[:50]}...") # Truncated for clean logs
         
-        # We removed sync_to_async because call_gemini is now fully asynchronous!
-        reply = await call_gemini(prompt)
-
-        if "❌" not in reply and "⚠️" not in reply:
-            self.chatbot_obj = await self.finalise_transaction(check_result['mode'])
-            await self.save_request_reply(message, reply)
-
-            await self.send(text_data=json.dumps({
-                "reply": reply,
-                "mode": check_result['mode']
-            }))
-        else:
+        # Forward the reply as it is generated; the reservation is only kept once it is complete
+        parts = []
+        try:
+            async for delta in stream_gemini(prompt):
+                parts.append(delta)
+                await self.send(text_data=json.dumps({
+                    "type": "delta",
+                    "delta": delta,
+                }))
+        except BaseException as e:
+            # Failed or cut off: nothing is charged
+            await sync_to_async(quota.release)(self.user, chatbot_id, mode)
+            if not isinstance(e, GeminiError):
+                raise
             await self.send(text_data=json.dumps({
                 "type": "error",
-                "message": reply 
+                "message": str(e)
             }))
+            return
 
+        reply = "".join(parts)
+        await sync_to_async(quota.commit)(self.user, chatbot_id, mode, message, reply, conversation)
+        if cacheable:
+            await chat_cache.set(message, reply, cache_context)
 
-    @sync_to_async
-    def check_can_ask(self):
-        """ Checks if the user has a right to ask a question. """
+        await self.send(text_data=json.dumps({
+            "type": "final",
+            "reply": reply,
+            "mode": mode
+        }))
+
+        if overflowed:
+            await self.request_summary(conversation)
+
+
+    def _chatbot_id(self):
         today = timezone.now().date()
-        obj, _ = ChatBot.objects.get_or_create(user=self.user, created_at__date=today)
+        if not self.chatbot_day or self.chatbot_day[0] != today:
+            self.chatbot_day = (today, quota.today_chatbot_id(self.user))
+        return self.chatbot_day[1]
 
-        if obj.request_count < 5:
-            return {'allowed': True, 'mode': 'free'}
+    @sync_to_async
+    def reserve(self):
+        """ Claims a free question or a credit before calling the AI; "free", "paid" or None. """
+        return quota.reserve(self.user, self._chatbot_id())
 
+    @sync_to_async
+    def get_note(self, note_id):
         try:
-            credits_obj = UserCredits.objects.get(user=self.user)
-            if credits_obj.remaining_credits > 0:
-                return {'allowed': True, 'mode': 'paid'}
-        except UserCredits.DoesNotExist:
-            pass
-
-        return {'allowed': False, 'mode': 'blocked'}
+            note = Notes.objects.filter(id=note_id, user=self.user).values_list("title", "transcript_text").first()
+        except ValidationError:
+            return None
+        if note is None:
+            return None
+        return note[0], note[1] or ""
 
     @sync_to_async
-    def finalise_transaction(self, mode):
-        """ Deducts credits and increments count ONLY on AI success. """
-        today = timezone.now().date()
-        obj = ChatBot.objects.get(user=self.user, created_at__date=today)
-        
-        if mode == 'paid':
-            credits_obj = UserCredits.objects.get(user=self.user)
-            credits_obj.used_credits += 1
-            credits_obj.save()
-            credit_usage = CreditUsageHistory.objects.create(
-                user = self.user,
-                credits_used = 1,
-                purpose = 'chat_bot'
-            )
-        
-        obj.request_count += 1
-        obj.save(update_fields=["request_count"])
-        return obj
+    def request_summary(self, conversation):
+        """ Older turns no longer fit the budget: fold them into the summary in the background. """
+        if memory.claim_summary(self.user, conversation):
+            summarize_conversation.delay(self.user.id, conversation)
 
     @sync_to_async
-    def save_request_reply(self, request_text, reply_text):
+    def save_cached_reply(self, request_text, reply_text, conversation):
+        # Cached answers are free: stored in history without touching the quota
         ChatBotMessage.objects.create(
-            chat_bot_Count=self.chatbot_obj,
+            chat_bot_Count_id=self._chatbot_id(),
             user=self.user,
             question=request_text,
-            answer=reply_text
-        )
\ No newline at end of file
+            answer=reply_text,
+            conversation=conversation,
+        )
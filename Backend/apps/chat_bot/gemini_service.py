@@ -1,8 +1,14 @@
 import os
-import aiohttp
+import json
+import time
+import random
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+from django.conf import settings
+from .http_client import get_session
+from .governor import get_governor, GovernorTimeout
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -12,55 +18,108 @@ GEMINI_URL = (
     "https://generativelanguage.googleapis.com/v1beta/"
     "models/gemini-2.5-flash:generateContent"
 )
+GEMINI_STREAM_URL = GEMINI_URL.replace(":generateContent", ":streamGenerateContent")
 
-async def call_gemini(prompt: str) -> str:
+# call_gemini reports failures as user-facing strings starting with these
+GEMINI_ERROR_PREFIXES = ("❌", "⚠️")
+
+# Worth another try after a backoff
+RETRY_STATUSES = (429, 500, 503)
+
+
+class GeminiError(Exception):
+    """ A failed call; the message is safe to show to the user. """
+
+
+def _backoff(attempt, retry_after):
+    """ Retry-After when the API gives one, otherwise full-jitter exponential backoff. """
+    if retry_after is not None:
+        return retry_after
+    cap = min(settings.GEMINI_BACKOFF_MAX, settings.GEMINI_BACKOFF_BASE * 2 ** attempt)
+    return random.uniform(0, cap)
+
+
+def _retry_after(response):
+    try:
+        return max(0.0, float(response.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return None
+
+
+@asynccontextmanager
+async def _gemini_response(url, payload, deadline):
+    """
+    Yields a 200 response. Each attempt waits its turn in the rate governor; 429 and
+    5xx are retried with backoff for as long as the deadline leaves room.
+    """
+    session = get_session()
+    governor = get_governor()
+
+    for attempt in range(settings.GEMINI_MAX_RETRIES + 1):
+        try:
+            async with governor.slot(deadline):
+                async with session.post(url, headers={"Content-Type": "application/json"}, json=payload) as response:
+                    if response.status == 200:
+                        yield response
+                        return
+
+                    if response.status not in RETRY_STATUSES:
+                        data = await response.json(content_type=None)
+                        error_msg = data.get("error", {}).get("message", "Unknown error")
+                        logger.error(f"Gemini API Error {response.status}: {error_msg}")
+                        raise GeminiError(f"❌ AI error: {error_msg}")
+
+                    status = response.status
+                    retry_after = _retry_after(response)
+        except GovernorTimeout:
+            logger.warning("Gemini request gave up waiting for a rate limit slot.")
+            raise GeminiError("⚠️ The AI is busy right now. Please try again in a moment.")
+
+        delay = _backoff(attempt, retry_after)
+        if status == 429:
+            logger.warning(f"Hit Gemini rate limit (429), backing off {delay:.1f}s.")
+            # Everyone in this process waits, not just this request
+            governor.pause(delay)
+
+        if attempt == settings.GEMINI_MAX_RETRIES or time.monotonic() + delay > deadline:
+            if status == 429:
+                raise GeminiError("⚠️ Too many requests. Please check your AI API quota.")
+            raise GeminiError(f"❌ AI service temporarily unstable after {attempt + 1} attempts.")
+        await asyncio.sleep(delay)
+
+
+def _request(prompt, max_wait):
     api_key = os.getenv("GEMINI_API_KEY")
 
     if not api_key:
         logger.error("API Key missing from environment variables.")
-        return "❌ API key not configured."
+        raise GeminiError("❌ API key not configured.")
 
     if not prompt.strip():
-        return "⚠️ Please enter a valid question."
+        raise GeminiError("⚠️ Please enter a valid question.")
 
-    headers = {"Content-Type": "application/json"}
     payload = {
         "contents": [{"parts": [{"text": prompt}]}]
     }
+    deadline = time.monotonic() + (max_wait or settings.GEMINI_MAX_WAIT)
+    return api_key, payload, deadline
 
+
+async def call_gemini(prompt: str, max_wait: float = None) -> str:
+    """ Whole reply as a string; failures come back as user-facing "❌"/"⚠️" messages. """
     try:
-        # Natively async HTTP client
-        async with aiohttp.ClientSession() as session:
-            for attempt in range(3):
-                async with session.post(
-                    f"{GEMINI_URL}?key={api_key}",
-                    headers=headers,
-                    json=payload,
-                    timeout=60
-                ) as response:
-
-                    if response.status == 429:
-                        logger.warning("Hit Gemini rate limit (429).")
-                        return "⚠️ Too many requests. Please check your AI API quota."
-
-                    if response.status in [500, 503]:
-                        await asyncio.sleep(2)
-                        continue
-
-                    data = await response.json()
-
-                    if response.status != 200:
-                        error_msg = data.get("error", {}).get("message", "Unknown error")
-                        logger.error(f"Gemini API Error {response.status}: {error_msg}")
-                        return f"❌ AI error: {error_msg}"
+        api_key, payload, deadline = _request(prompt, max_wait)
+        async with _gemini_response(f"{GEMINI_URL}?key={api_key}", payload, deadline) as response:
+            data = await response.json()
 
-                    if "candidates" not in data or not data["candidates"]:
-                        logger.warning("Empty candidates. Likely blocked by safety settings.")
-                        return "⚠️ AI response blocked or empty."
+        if "candidates" not in data or not data["candidates"]:
+            logger.warning("Empty candidates. Likely blocked by safety settings.")
+            return "⚠️ AI response blocked or empty."
 
-                    return data["candidates"][0]["content"]["parts"][0]["text"]
+        return data["candidates"][0]["content"]["parts"][0]["text"]
 
-            return "❌ AI service temporarily unstable after 3 retries."
+    except GeminiError as e:
+        return str(e)
 
     except asyncio.TimeoutError:
         logger.error("Gemini API request timed out.")
@@ -68,4 +127,41 @@ async def call_gemini(prompt: str) -> str:
 
     except Exception as e:
         logger.error(f"Unexpected error in call_gemini: {str(e)}")
-        return "❌ Something went wrong. Please try again later."
\ No newline at end of file
+        return "❌ Something went wrong. Please try again later."
+
+
+async def stream_gemini(prompt: str, max_wait: float = None):
+    """
+    Yields the reply piece by piece as Gemini produces it (server-sent events).
+    Failures raise GeminiError with the same user-facing messages call_gemini returns.
+    Retries only happen before anything has been yielded.
+    """
+    try:
+        api_key, payload, deadline = _request(prompt, max_wait)
+        async with _gemini_response(f"{GEMINI_STREAM_URL}?alt=sse&key={api_key}", payload, deadline) as response:
+            produced = False
+            async for line in response.content:
+                line = line.decode().strip()
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:"):])
+                for candidate in event.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            produced = True
+                            yield part["text"]
+
+        if not produced:
+            logger.warning("Empty candidates. Likely blocked by safety settings.")
+            raise GeminiError("⚠️ AI response blocked or empty.")
+
+    except GeminiError:
+        raise
+
+    except asyncio.TimeoutError:
+        logger.error("Gemini API request timed out.")
+        raise GeminiError("❌ AI request timed out.")
+
+    except Exception as e:
+        logger.error(f"Unexpected error in stream_gemini: {str(e)}")
+        raise GeminiError("❌ Something went wrong. Please try again later.")
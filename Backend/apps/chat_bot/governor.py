@@ -0,0 +1,101 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from django.conf import settings
+
+_governors = {}
+
+
+class GovernorTimeout(Exception):
+    """ The request could not get a slot before its deadline. """
+
+
+class RateGovernor:
+    """
+    Keeps outbound Gemini traffic inside the quota: a token bucket refilled at
+    `rate` requests per second (up to `burst` saved up) and a semaphore capping
+    requests in flight. Waiters are served strictly in arrival order, and anyone
+    whose deadline would pass while queued is told so immediately instead of
+    sitting in the queue.
+    """
+
+    def __init__(self, rate, burst, max_concurrent):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        # No tokens are handed out before this, e.g. after a 429 with Retry-After
+        self.paused_until = 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        # asyncio.Lock wakes waiters first come, first served
+        self._gate = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _token_wait(self):
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def pause(self, seconds):
+        """ The API pushed back; stop issuing tokens for a while and start the bucket empty. """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+    @asynccontextmanager
+    async def slot(self, deadline):
+        """ Holds one request's worth of quota and concurrency; `deadline` is a time.monotonic() value. """
+        def remaining():
+            return deadline - time.monotonic()
+
+        try:
+            await asyncio.wait_for(self._gate.acquire(), timeout=max(0.0, remaining()))
+        except asyncio.TimeoutError:
+            raise GovernorTimeout()
+
+        try:
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=max(0.0, remaining()))
+            except asyncio.TimeoutError:
+                raise GovernorTimeout()
+
+            try:
+                wait = self._token_wait()
+                while wait > 0:
+                    if wait > remaining():
+                        raise GovernorTimeout()
+                    await asyncio.sleep(wait)
+                    wait = self._token_wait()
+                self.tokens -= 1
+            except BaseException:
+                # Out of time, or cancelled (the client went away): the permit goes back
+                self._semaphore.release()
+                raise
+        finally:
+            # The next in line may start queueing for its own token now
+            self._gate.release()
+
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+def get_governor():
+    """ One governor per event loop: process-wide under Daphne, per task run in Celery. """
+    loop = asyncio.get_running_loop()
+    for stale in [l for l in _governors if l.is_closed()]:
+        _governors.pop(stale)
+    if loop not in _governors:
+        _governors[loop] = RateGovernor(
+            rate=settings.GEMINI_REQUESTS_PER_MINUTE / 60,
+            burst=settings.GEMINI_BURST,
+            max_concurrent=settings.GEMINI_MAX_CONCURRENT,
+        )
+    return _governors[loop]
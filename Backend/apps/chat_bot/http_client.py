@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from collections import deque
+import aiohttp
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ClientMetrics:
+    """ Connection reuse and request latency, fed by aiohttp's trace hooks. """
+
+    def __init__(self, window=500):
+        self.requests = 0
+        self.failures = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.latencies = deque(maxlen=window)
+
+    def trace_config(self):
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_end.append(self._on_request_end)
+        trace.on_request_exception.append(self._on_request_exception)
+        trace.on_connection_create_end.append(self._on_connection_create_end)
+        trace.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        return trace
+
+    async def _on_request_start(self, session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def _on_request_end(self, session, ctx, params):
+        self.requests += 1
+        self.latencies.append(time.perf_counter() - ctx.started)
+
+    async def _on_request_exception(self, session, ctx, params):
+        self.failures += 1
+
+    async def _on_connection_create_end(self, session, ctx, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, ctx, params):
+        self.connections_reused += 1
+
+    @property
+    def stats(self):
+        latencies = sorted(self.latencies)
+        connections = self.connections_created + self.connections_reused
+
+        def pct(p):
+            return round(latencies[int(p * (len(latencies) - 1))], 3) if latencies else None
+
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / connections, 3) if connections else None,
+            "latency_p50": pct(0.5),
+            "latency_p95": pct(0.95),
+        }
+
+
+class ClientManager:
+    """
+    One keep-alive ClientSession per event loop, shared by every outbound API call
+    on that loop. Sessions are bound to the loop they were created on, so Daphne
+    gets one for the life of the process while each asyncio.run() in a Celery task
+    gets its own and closes it on the way out.
+    """
+
+    def __init__(self):
+        self.metrics = ClientMetrics()
+        self._sessions = {}
+
+    def session(self):
+        loop = asyncio.get_running_loop()
+        # Loops that finished without closing their session (a crashed task) are dropped here
+        for stale in [l for l in self._sessions if l.is_closed()]:
+            self._sessions.pop(stale)
+
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.GEMINI_HTTP_POOL_LIMIT,
+                limit_per_host=settings.GEMINI_HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=settings.GEMINI_HTTP_KEEPALIVE,
+                ttl_dns_cache=300,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.GEMINI_HTTP_TIMEOUT),
+                trace_configs=[self.metrics.trace_config()],
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def close(self):
+        """ Closes the session belonging to the running loop. """
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session and not session.closed:
+            await session.close()
+
+    async def close_all(self):
+        """ Closes every session; used on ASGI lifespan shutdown. """
+        loop = asyncio.get_running_loop()
+        for session_loop, session in list(self._sessions.items()):
+            if session_loop is loop and not session.closed:
+                await session.close()
+        self._sessions.clear()
+        logger.info(f"Outbound HTTP sessions closed, {self.metrics.stats}")
+
+
+_manager = ClientManager()
+
+
+def get_session():
+    return _manager.session()
+
+
+async def close_session():
+    await _manager.close()
+
+
+async def close_all_sessions():
+    await _manager.close_all()
+
+
+def client_stats():
+    return _manager.metrics.stats
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from .models import ChatBotMessage, ChatMemory
+
+# A queued summarization older than this is assumed lost and may be requested again
+SUMMARY_REQUEST_TIMEOUT = timedelta(minutes=10)
+
+
+def estimate_tokens(text):
+    # Close enough to Gemini's tokenizer for English prose
+    return len(text) // 4 + 1
+
+
+def unsummarized(user, conversation, memory):
+    messages = ChatBotMessage.objects.filter(user=user, conversation=conversation)
+    if memory and memory.summarized_until:
+        messages = messages.filter(created_at__gt=memory.summarized_until)
+    return messages
+
+
+def load_history(user, conversation):
+    """
+    Returns (summary, recent turns oldest first, overflowed) for one conversation:
+    a note's id, or "" for general chat, so turns never cross notes. Recent turns are
+    taken newest first until CHAT_MEMORY_TOKEN_BUDGET is spent; `overflowed` means
+    older unsummarized turns were left out and should be folded into the summary.
+    """
+    memory = ChatMemory.objects.filter(user=user, conversation=conversation).first()
+    summary = memory.summary if memory else ""
+    budget = settings.CHAT_MEMORY_TOKEN_BUDGET - estimate_tokens(summary)
+
+    turns = []
+    overflowed = False
+    rows = unsummarized(user, conversation, memory).order_by("-created_at").values_list("question", "answer")
+    for question, answer in rows[:settings.CHAT_MEMORY_MAX_TURNS + 1]:
+        cost = estimate_tokens(question) + estimate_tokens(answer)
+        if len(turns) == settings.CHAT_MEMORY_MAX_TURNS or cost > budget:
+            overflowed = True
+            break
+        turns.append((question, answer))
+        budget -= cost
+
+    turns.reverse()
+    return summary, turns, overflowed
+
+
+def claim_summary(user, conversation):
+    """ True for exactly one caller while no summarization is pending for this conversation. """
+    memory, _ = ChatMemory.objects.get_or_create(user=user, conversation=conversation)
+    stale = timezone.now() - SUMMARY_REQUEST_TIMEOUT
+    return bool(
+        ChatMemory.objects
+        .filter(id=memory.id)
+        .filter(Q(summary_requested_at__isnull=True) | Q(summary_requested_at__lt=stale))
+        .update(summary_requested_at=timezone.now())
+    )
+
+
+def format_history(summary, turns):
+    parts = []
+    if summary:
+        parts.append(f"Summary of the earlier conversation: {summary}")
+    if turns:
+        parts.append("Recent conversation:\n" + "\n".join(
+            f"Student: {question}\nAssistant: {answer}" for question, answer in turns
+        ))
+    return "\n\n".join(parts)
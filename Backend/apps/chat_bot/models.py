@@ -30,7 +30,26 @@ class ChatBotMessage(models.Model):
 
     question = models.TextField()
     answer = models.TextField()
+    # Id of the note the question was about, "" for general chat; memory is kept per conversation
+    conversation = models.CharField(max_length=64, blank=True, default="", db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["created_at"]
+
+class ChatMemory(models.Model):
+    """
+    Rolling summary of one of a user's conversations (a note, or general chat).
+    Turns up to `summarized_until` live only in `summary`; later ones are replayed
+    verbatim while they fit the budget.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="chat_memories")
+    conversation = models.CharField(max_length=64, blank=True, default="")
+    summary = models.TextField(blank=True, default="")
+    summarized_until = models.DateTimeField(null=True, blank=True)
+    # Set while a summarization job is queued or running, so only one is in flight
+    summary_requested_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("user", "conversation")
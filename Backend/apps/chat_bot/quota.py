@@ -0,0 +1,98 @@
+import threading
+import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.accounts.models import UserCredits
+from apps.subscriptions.models import CreditUsageHistory
+from .models import ChatBot, ChatBotMessage
+
+# Questions per day before credits are spent
+FREE_DAILY_QUESTIONS = 5
+
+_usage = []
+_usage_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def today_chatbot_id(user):
+    """ Today's ChatBot counter row, created on the first question of the day. """
+    obj, _ = ChatBot.objects.get_or_create(user=user, created_at__date=timezone.now().date())
+    return obj.id
+
+
+def reserve(user, chatbot_id):
+    """
+    Takes one question's worth of quota and returns "free", "paid" or None. Each
+    step is a single conditional UPDATE, so two sockets of the same user can never
+    both spend the last free question or the last credit.
+    """
+    if ChatBot.objects.filter(id=chatbot_id, request_count__lt=FREE_DAILY_QUESTIONS).update(
+        request_count=F("request_count") + 1
+    ):
+        return "free"
+
+    if UserCredits.objects.filter(user=user, remaining_credits__gt=0).update(
+        used_credits=F("used_credits") + 1,
+        remaining_credits=F("remaining_credits") - 1,
+        updated_at=timezone.now(),
+    ):
+        return "paid"
+    return None
+
+
+def commit(user, chatbot_id, mode, question, answer, conversation=""):
+    """ The answer was delivered: keep the reservation and store the exchange. """
+    with transaction.atomic():
+        if mode == "paid":
+            # Free questions were counted when reserved
+            ChatBot.objects.filter(id=chatbot_id).update(request_count=F("request_count") + 1)
+        ChatBotMessage.objects.create(
+            chat_bot_Count_id=chatbot_id,
+            user=user,
+            question=question,
+            answer=answer,
+            conversation=conversation,
+        )
+
+    if mode == "paid":
+        record_usage(user, "chat_bot")
+
+
+def release(user, chatbot_id, mode):
+    """ The AI call failed: hand the reserved question or credit back. """
+    if mode == "free":
+        ChatBot.objects.filter(id=chatbot_id).update(request_count=F("request_count") - 1)
+    elif mode == "paid":
+        UserCredits.objects.filter(user=user).update(
+            used_credits=F("used_credits") - 1,
+            remaining_credits=F("remaining_credits") + 1,
+            updated_at=timezone.now(),
+        )
+
+
+def record_usage(user, purpose, credits=1):
+    """
+    Credit history is an audit trail, not the balance, so rows are buffered and
+    inserted in batches. created_at is the flush time, at most
+    CREDIT_HISTORY_FLUSH_SECONDS after the spend.
+    """
+    with _usage_lock:
+        _usage.append(CreditUsageHistory(user=user, credits_used=credits, purpose=purpose))
+        due = (
+            len(_usage) >= settings.CREDIT_HISTORY_BATCH_SIZE
+            or time.monotonic() - _last_flush >= settings.CREDIT_HISTORY_FLUSH_SECONDS
+        )
+    if due:
+        flush_usage()
+
+
+def flush_usage():
+    global _last_flush
+    with _usage_lock:
+        rows = _usage[:]
+        _usage.clear()
+        _last_flush = time.monotonic()
+    if rows:
+        CreditUsageHistory.objects.bulk_create(rows)
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+import numpy as np
+import redis.asyncio as redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "aicache"
+# Paraphrase candidates compared per note context
+MAX_VECTORS_PER_CONTEXT = 500
+
+_clients = {}
+_embedder = None
+
+
+def normalize(text):
+    """ Case, spacing and trailing punctuation do not change the answer. """
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip("?!. ")
+
+
+def digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _client():
+    # redis.asyncio connections belong to the loop that opened them
+    loop = asyncio.get_running_loop()
+    for stale in [l for l in _clients if l.is_closed()]:
+        _clients.pop(stale)
+    if loop not in _clients:
+        _clients[loop] = redis.Redis.from_url(settings.RESPONSE_CACHE_REDIS_URL)
+    return _clients[loop]
+
+
+async def close_client():
+    """ Closes the running loop's connection pool, for loops that end with the call (Celery tasks). """
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _embed(text):
+    global _embedder
+    if _embedder is None:
+        from sentence_transformers import SentenceTransformer
+
+        _embedder = SentenceTransformer(settings.RESPONSE_CACHE_EMBEDDING_MODEL, device="cpu")
+    return _embedder.encode(text, normalize_embeddings=True).astype(np.float32)
+
+
+class ResponseCache:
+    """
+    Gemini replies in Redis, keyed on the normalized prompt plus a hash of the note
+    context it was asked about. Entries expire after a TTL, and a sorted set of
+    last-hit times evicts the least recently used once the cache is full. With
+    `semantic`, a miss falls back to comparing a local CPU embedding of the question
+    against earlier questions on the same context, so paraphrases hit too.
+
+    Redis being unavailable is a miss, never an error.
+    """
+
+    def __init__(self, kind, semantic=False):
+        self.kind = kind
+        self.semantic = semantic and settings.RESPONSE_CACHE_SEMANTIC
+
+    def _key(self, question_hash, context_hash):
+        return f"{PREFIX}:{self.kind}:{context_hash}:{question_hash}"
+
+    def _lru(self):
+        return f"{PREFIX}:{self.kind}:lru"
+
+    def _vectors(self, context_hash):
+        return f"{PREFIX}:{self.kind}:vectors:{context_hash}"
+
+    async def get(self, question, context=""):
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return None
+        question_hash, context_hash = digest(normalize(question)), digest(context)
+
+        try:
+            client = _client()
+            key = self._key(question_hash, context_hash)
+            reply = await client.get(key)
+
+            if reply is None and self.semantic:
+                key = await self._similar(client, question, context_hash)
+                reply = await client.get(key) if key else None
+
+            if reply is None:
+                return None
+            await client.zadd(self._lru(), {key: time.time()})
+            return reply.decode()
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None
+
+    async def set(self, question, reply, context=""):
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return
+        question_hash, context_hash = digest(normalize(question)), digest(context)
+        key = self._key(question_hash, context_hash)
+
+        try:
+            client = _client()
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.set(key, reply, ex=settings.RESPONSE_CACHE_TTL)
+                pipe.zadd(self._lru(), {key: time.time()})
+                pipe.zcard(self._lru())
+                *_, size = await pipe.execute()
+
+            overflow = size - settings.RESPONSE_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                evicted = [member for member, _ in await client.zpopmin(self._lru(), overflow)]
+                if evicted:
+                    await client.delete(*evicted)
+
+            if self.semantic:
+                vectors = self._vectors(context_hash)
+                if await client.hlen(vectors) < MAX_VECTORS_PER_CONTEXT:
+                    vector = await asyncio.to_thread(_embed, normalize(question))
+                    await client.hset(vectors, question_hash, vector.tobytes())
+                    await client.expire(vectors, settings.RESPONSE_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    async def _similar(self, client, question, context_hash):
+        """ Key of the closest earlier question on this context, if it is close enough. """
+        stored = await client.hgetall(self._vectors(context_hash))
+        if not stored:
+            return None
+
+        vector = await asyncio.to_thread(_embed, normalize(question))
+        hashes = list(stored)
+        matrix = np.frombuffer(b"".join(stored[h] for h in hashes), dtype=np.float32).reshape(len(hashes), -1)
+        # Embeddings are unit length, so the dot product is the cosine similarity
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < settings.RESPONSE_CACHE_SIMILARITY:
+            return None
+
+        key = self._key(hashes[best].decode(), context_hash)
+        if not await client.exists(key):
+            # The reply expired or was evicted; forget its vector too
+            await client.hdel(self._vectors(context_hash), hashes[best])
+            return None
+        return key
@@ -0,0 +1,99 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from django.conf import settings
+
+# Indexes kept per process, keyed by note and content so edits rebuild automatically
+MAX_CACHED_INDEXES = 128
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by do does for from has have how i if in is it its of on or so "
+    "that the their there these this to was were what when where which who why will with you your".split()
+)
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+def tokenize(text):
+    return [word for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS]
+
+
+def chunk_text(text, chunk_words):
+    """ Groups whole sentences into chunks of roughly `chunk_words` words. """
+    sentences = re.split(r"(?<=[.!?])\s+|\n\s*\n", text.strip())
+    chunks, current, size = [], [], 0
+    for sentence in sentences:
+        words = len(sentence.split())
+        if current and size + words > chunk_words:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += words
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class Bm25Index:
+    """ Okapi BM25 over the chunks of one note. """
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.terms = [Counter(tokenize(chunk)) for chunk in chunks]
+        self.lengths = [sum(terms.values()) for terms in self.terms]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+        df = Counter(term for terms in self.terms for term in terms)
+        n = len(chunks)
+        self.idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def search(self, query, k):
+        """ Indices of the `k` best chunks, best first; chunks sharing no term with the query are left out. """
+        query_terms = set(tokenize(query))
+        scores = []
+        for i, terms in enumerate(self.terms):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1))
+            for term in query_terms:
+                tf = terms.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((score, i))
+        scores.sort(reverse=True)
+        return [i for _, i in scores[:k]]
+
+
+def get_index(note_id, text):
+    key = (str(note_id), hashlib.sha256(text.encode()).hexdigest())
+    with _lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            return _indexes[key]
+
+    index = Bm25Index(chunk_text(text, settings.CHAT_CONTEXT_CHUNK_WORDS))
+    with _lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def select_context(note_id, text, question):
+    """
+    The parts of a note worth sending with this question: short notes go whole,
+    long ones are cut to the top-k BM25 chunks, kept in their original order.
+    """
+    text = (text or "").strip()
+    if len(text) <= settings.CHAT_CONTEXT_FULL_CHARS:
+        return text
+
+    index = get_index(note_id, text)
+    k = settings.CHAT_CONTEXT_TOP_K
+    # Nothing matched (e.g. "summarise this"): the opening of the note is the best guess
+    best = index.search(question, k) or list(range(min(k, len(index.chunks))))
+    return "\n...\n".join(index.chunks[i] for i in sorted(best))
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from .gemini_service import call_gemini, GEMINI_ERROR_PREFIXES
+from .http_client import close_session
+from .memory import estimate_tokens, unsummarized
+from .models import ChatMemory
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "You keep a running summary of a conversation between a student and a study assistant. "
+    "Update the summary with the new exchanges below. Keep facts, topics, the student's goals "
+    "and anything the assistant promised or explained that later questions may refer to. "
+    "Write at most {words} words of plain prose and return only the summary.\n\n"
+    "Current summary:\n{summary}\n\nNew exchanges:\n{turns}"
+)
+
+
+async def _summarize(prompt):
+    try:
+        return await call_gemini(prompt, max_wait=settings.GEMINI_BACKGROUND_MAX_WAIT)
+    finally:
+        await close_session()
+
+
+@shared_task
+def summarize_conversation(user_id, conversation=""):
+    """
+    Folds the older unsummarized turns of one conversation into its rolling summary, leaving the
+    newest turns (up to CHAT_MEMORY_RECENT_TOKENS, and half of CHAT_MEMORY_MAX_TURNS)
+    verbatim so the next prompts have room before another fold is needed.
+    """
+    user = get_user_model().objects.get(id=user_id)
+    memory, _ = ChatMemory.objects.get_or_create(user=user, conversation=conversation)
+
+    try:
+        messages = list(unsummarized(user, conversation, memory).order_by("created_at").values("question", "answer", "created_at"))
+
+        keep, budget = 0, settings.CHAT_MEMORY_RECENT_TOKENS
+        for message in reversed(messages):
+            cost = estimate_tokens(message["question"]) + estimate_tokens(message["answer"])
+            if cost > budget or keep == settings.CHAT_MEMORY_MAX_TURNS // 2:
+                break
+            budget -= cost
+            keep += 1
+
+        fold = messages[:len(messages) - keep]
+        if not fold:
+            return 0
+
+        turns = "\n".join(f"Student: {m['question']}\nAssistant: {m['answer']}" for m in fold)
+        summary = asyncio.run(_summarize(SUMMARY_PROMPT.format(
+            words=settings.CHAT_MEMORY_SUMMARY_WORDS,
+            summary=memory.summary or "(none yet)",
+            turns=turns,
+        )))
+        if summary.startswith(GEMINI_ERROR_PREFIXES):
+            logger.warning(f"Chat summary for user {user_id} ({conversation or 'general'}) failed: {summary}")
+            return 0
+
+        memory.summary = summary.strip()
+        memory.summarized_until = fold[-1]["created_at"]
+        memory.save(update_fields=["summary", "summarized_until", "updated_at"])
+        return len(fold)
+    finally:
+        ChatMemory.objects.filter(id=memory.id).update(summary_requested_at=None)
@@ -1,3 +1,26 @@
-from django.test import TestCase
+import asyncio
+import time
+from django.test import SimpleTestCase
+from .governor import RateGovernor
 
-# Create your tests here.
+
+class RateGovernorTests(SimpleTestCase):
+    async def enter(self, governor, seconds):
+        async with governor.slot(time.monotonic() + seconds):
+            pass
+
+    def test_cancelled_waiter_releases_its_permit(self):
+        async def scenario():
+            governor = RateGovernor(rate=5.0, burst=1, max_concurrent=1)
+            await self.enter(governor, 1)
+
+            # The bucket is empty now, so this waits for a token while holding the only permit
+            waiter = asyncio.create_task(self.enter(governor, 5))
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+
+            await self.enter(governor, 2)
+
+        asyncio.run(scenario())
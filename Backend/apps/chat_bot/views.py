@@ -3,7 +3,7 @@ import google.generativeai as genai
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from dotenv import load_dotenv
-from .models import ChatBotMessage
+from .models import ChatBotMessage, ChatMemory
 from rest_framework.permissions import IsAuthenticated
 from .serializers import ChatBotMessageSerializer
 
@@ -26,9 +26,10 @@ class ChatHistoryView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        # One conversation per note (?note_id=), general chat without it
         messages = (
             ChatBotMessage.objects
-            .filter(user=request.user)
+            .filter(user=request.user, conversation=request.query_params.get("note_id", ""))
             .order_by("created_at")
         )
 
@@ -44,5 +45,7 @@ class ChatClearView(APIView):
             .filter(user=request.user)
         )
         messages.delete()
+        # Start the next conversation without the old summary
+        ChatMemory.objects.filter(user=request.user).delete()
 
         return Response('chat cleared')
\ No newline at end of file
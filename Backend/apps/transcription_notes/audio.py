@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import subprocess
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+def load_audio(path):
+    """ Decodes a whole file to mono float32 PCM at 16 kHz, whatever engine reads it afterwards. """
+    result = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-i", path,
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "pipe:1",
+        ],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode {path}: {result.stderr.decode(errors='ignore').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+class PcmBuffer:
+    """
+    Fixed-capacity ring of mono float32 PCM at 16 kHz, addressed in session seconds.
+    Every sample is stored twice (at i and i + capacity), so any window up to the
+    capacity is a single contiguous view: appending, trimming and snapshotting
+    never reallocate or copy old audio.
+    """
+
+    def __init__(self, max_seconds=60):
+        self.capacity = int(max_seconds * SAMPLE_RATE)
+        self._ring = np.zeros(2 * self.capacity, dtype=np.float32)
+        # Samples ever appended; the ring holds the last `capacity` of them
+        self.total = 0
+
+    @property
+    def start_sample(self):
+        return max(0, self.total - self.capacity)
+
+    @property
+    def start_time(self):
+        return self.start_sample / SAMPLE_RATE
+
+    @property
+    def end_time(self):
+        return self.total / SAMPLE_RATE
+
+    def append(self, chunk):
+        """ Accepts int16 (converted in place) or float32 samples. """
+        if len(chunk) > self.capacity:
+            self.total += len(chunk) - self.capacity
+            chunk = chunk[-self.capacity:]
+
+        pos = self.total % self.capacity
+        first = min(len(chunk), self.capacity - pos)
+        self._write(pos, chunk[:first])
+        self._write(0, chunk[first:])
+        self.total += len(chunk)
+
+    def _write(self, pos, samples):
+        count = len(samples)
+        if not count:
+            return
+        dest = self._ring[pos:pos + count]
+        if samples.dtype == np.int16:
+            np.multiply(samples, 1 / 32768.0, out=dest)
+        else:
+            dest[:] = samples
+        self._ring[pos + self.capacity:pos + self.capacity + count] = dest
+
+    def since(self, start, end=None):
+        """
+        Returns (actual start, view of samples from `start` to `end` or the end of the buffer).
+        The view aliases the ring: its oldest samples are overwritten once more than
+        `capacity` minus (samples from `start` to the end) arrive, which for a full-size
+        window is the very next chunk. Use it synchronously, or copy it before awaiting.
+        """
+        first = max(int(round(start * SAMPLE_RATE)), self.start_sample)
+        last = self.total if end is None else min(self.total, int(round(end * SAMPLE_RATE)))
+        offset = first % self.capacity
+        return first / SAMPLE_RATE, self._ring[offset:offset + max(0, last - first)]
+
+
+class StreamDecoder:
+    """
+    One ffmpeg process per connection: WebM/Opus bytes go in on stdin,
+    16 kHz s16le PCM comes out on stdout and lands in `self.pcm`.
+    """
+
+    def __init__(self, max_seconds=60):
+        self.pcm = PcmBuffer(max_seconds)
+        self.process = None
+        self._reader = None
+        self._leftover = b""
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-fflags", "nobuffer", "-probesize", "32768",
+            "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        self._reader = asyncio.create_task(self._read())
+
+    async def feed(self, data):
+        if self.process is None or self.process.stdin.is_closing():
+            return
+        try:
+            self.process.stdin.write(data)
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.warning("ffmpeg decoder exited early")
+
+    async def _read(self):
+        while True:
+            raw = await self.process.stdout.read(SAMPLE_RATE * 2)
+            if not raw:
+                break
+            if self._leftover:
+                raw = self._leftover + raw
+            # s16le samples are 2 bytes; keep an odd trailing byte for the next read
+            usable = len(raw) - len(raw) % 2
+            self._leftover = raw[usable:]
+            # Straight from the pipe's bytes into the ring, no intermediate arrays
+            self.pcm.append(np.frombuffer(raw, dtype=np.int16, count=usable // 2))
+
+    async def close(self):
+        if self.process is None:
+            return
+        if not self.process.stdin.is_closing():
+            self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self._reader, timeout=2)
+        except asyncio.TimeoutError:
+            self._reader.cancel()
+        if self.process.returncode is None:
+            self.process.kill()
+        await self.process.wait()
+        self.process = None
@@ -0,0 +1,46 @@
+import time
+
+
+class CadenceController:
+    """
+    How often one live session asks for a transcript update. The interval widens
+    multiplicatively when the shared scheduler is slow or filling up and narrows
+    step by step when it is idle, so a load spike costs update frequency rather
+    than a growing backlog.
+    """
+
+    WIDEN = 1.5
+    NARROW = 0.5
+
+    def __init__(self, min_interval, max_interval, target_latency, initial=3.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_latency = target_latency
+        self.interval = min(max(initial, min_interval), max_interval)
+        self.last_update = 0.0
+
+    def due(self):
+        return time.monotonic() - self.last_update >= self.interval
+
+    def mark(self):
+        self.last_update = time.monotonic()
+
+    def observe(self, latency, load):
+        """ Feeds back scheduler latency (seconds) and queue fill (0-1); returns True if the interval changed. """
+        previous = self.interval
+        if latency > self.target_latency or load > 0.5:
+            interval = self.interval * self.WIDEN
+        elif latency < self.target_latency / 2 and load == 0:
+            interval = self.interval - self.NARROW
+        else:
+            interval = self.interval
+        # Asking again before the last answer could come back only adds queueing
+        interval = max(interval, latency)
+        self.interval = round(min(max(interval, self.min_interval), self.max_interval), 2)
+        return self.interval != previous
+
+    def backoff(self):
+        """ The scheduler refused work: slow right down and let it drain. """
+        previous = self.interval
+        self.interval = self.max_interval
+        return self.interval != previous
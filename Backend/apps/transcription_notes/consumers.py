@@ -1,76 +1,356 @@
-import os
 import json
-import tempfile
-import asyncio
-import whisper
+import logging
+import time
+from urllib.parse import parse_qs
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Concat
 from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+from .audio import StreamDecoder, SAMPLE_RATE
+from .cadence import CadenceController
+from .model_pool import PoolBusy
+from .models import UploadTranscription, LiveTranscriptionSession, Notes, NoteEnhancement
+from .scheduler import get_scheduler
+from .streaming import IncrementalTranscript
+from .vad import SpeechGate
 
-model = whisper.load_model("tiny")
+logger = logging.getLogger(__name__)
 
 
 class LiveTranscriptionConsumer(AsyncWebsocketConsumer):
+    # Seconds of undecided audio needed before an update is worth running
+    MIN_WINDOW = 2.0
+    # Committed text is written to the session in batches, not per update
+    CHECKPOINT_SEGMENTS = 5
+    CHECKPOINT_SECONDS = 15
+
     async def connect(self):
         await self.accept()
 
-        self.audio_buffer = bytearray()
-        self.chunk_counter = 0
+        self.user = self.scope["user"]
+        self.scheduler = get_scheduler()
+        self.cadence = CadenceController(
+            min_interval=settings.LIVE_UPDATE_MIN_INTERVAL,
+            max_interval=settings.LIVE_UPDATE_MAX_INTERVAL,
+            target_latency=settings.LIVE_UPDATE_TARGET_LATENCY,
+        )
+        self.transcript = IncrementalTranscript()
+        self.gate = SpeechGate()
+
+        self.session = None
+        self.pending_commits = []
+        # End of an utterance whose boundary decode has not committed yet
+        self.pending_boundary = None
+        self.last_checkpoint = time.monotonic()
+        # Audio seconds already covered by the session before this connection
+        self.session_offset = 0.0
+
+        # ~60 seconds rolling PCM window
+        self.decoder = StreamDecoder(max_seconds=60)
+        await self.decoder.start()
+
+        # Only signed-in users get a resumable session
+        if self.user and self.user.is_authenticated:
+            query = parse_qs(self.scope.get("query_string", b"").decode())
+            self.session = await self.open_session(query.get("session", [None])[0])
+            self.session_offset = self.session.committed_until
+            if self.session.transcript:
+                self.transcript.committed = [self.session.transcript.strip()]
 
-        # ~6 seconds rolling window
-        self.MAX_BUFFER = 5 * 1024 * 1024
+            await self.send(json.dumps({
+                "type": "session",
+                "id": str(self.session.id),
+                "transcript": self.session.transcript,
+            }))
 
+        await self.send_cadence()
         print("WS connected")
 
     async def disconnect(self, close_code):
-        print("WS disconnected")
+        await self.decoder.close()
+        # The session stays active so the client can reconnect and resume
+        await self.checkpoint()
+        logger.info(f"Live transcription socket closed, VAD {self.gate.stats}")
 
     async def receive(self, text_data=None, bytes_data=None):
+        if text_data:
+            try:
+                data = json.loads(text_data)
+            except json.JSONDecodeError:
+                return
+            if data.get("action") == "close":
+                await self.close_session(data.get("title", "").strip(), data.get("transcript_text"))
+            return
+
         if not bytes_data:
             return
 
-        self.audio_buffer.extend(bytes_data)
-        self.chunk_counter += 1
+        await self.decoder.feed(bytes_data)
 
-        # Trim buffer (keep last ~75%)
-        if len(self.audio_buffer) > self.MAX_BUFFER:
-            self.audio_buffer = self.audio_buffer[-int(self.MAX_BUFFER * 0.75):]
+        state, boundary = self.gate.advance(self.decoder.pcm)
 
-        # Transcribe every 3 chunks (stable)
-        if self.chunk_counter % 3 != 0:
+        # Nobody is talking: no inference, and the next window starts after the pause
+        if state == "silence":
+            # Unless the last utterance never got decoded; skipping now would drop it
+            if self.pending_boundary is not None:
+                if not self.cadence.due() or not await self.transcribe_snapshot(end=self.pending_boundary):
+                    return
+                self.pending_boundary = None
+            self.transcript.skip_to(self.gate.analysed_until)
             return
 
-        await self.transcribe_snapshot()
+        # An utterance just ended: decode up to the pause and commit it whole
+        if state == "boundary":
+            self.pending_boundary = boundary
+            if await self.transcribe_snapshot(end=boundary):
+                self.pending_boundary = None
+            return
 
-    async def transcribe_snapshot(self):
-        if len(self.audio_buffer) < 80_000:
+        # Tentative updates follow the adaptive cadence
+        if not self.cadence.due():
             return
 
-        loop = asyncio.get_event_loop()
+        await self.transcribe_snapshot()
+
+    async def transcribe_snapshot(self, end=None):
+        """ False when the window could not be decoded, so its audio still needs to be. """
+        start, audio = self.decoder.pcm.since(self.transcript.window_start(), end)
+        duration = len(audio) / SAMPLE_RATE
+        if not duration or (end is None and duration < self.MIN_WINDOW):
+            return True
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as f:
-            f.write(self.audio_buffer)
-            path = f.name
+        window_end = start + duration
+        self.cadence.mark()
 
         try:
-            text = await loop.run_in_executor(None, self.run_whisper, path)
+            segments = await self.scheduler.transcribe(audio, start)
 
-            if text:
-                # 🔥 SEND FULL SNAPSHOT (NOT DIFF)
-                await self.send(json.dumps({
-                    "text": text
-                }))
+        except PoolBusy:
+            # Audio stays buffered, the next snapshot picks it up
+            await self.send(json.dumps({
+                "type": "busy",
+                "message": "Transcription is busy, catching up shortly."
+            }))
+            if self.cadence.backoff():
+                await self.send_cadence()
+            return False
 
-        finally:
-            os.remove(path)
+        except Exception as e:
+            # A failed decode (e.g. a pool worker died) skips this update, not the socket
+            logger.error(f"Live transcription update failed: {e}")
+            return False
 
-    def run_whisper(self, path):
-        try:
-            result = model.transcribe(
-                path,
-                fp16=False,
-                language="en",
-                no_speech_threshold=0.6,
+        if self.cadence.observe(self.scheduler.latency, self.scheduler.load):
+            await self.send_cadence()
+
+        if segments is None:
+            return False
+
+        self.gate.mark_processed(duration)
+        committed, tentative = self.transcript.update(segments, window_end, final=end is not None)
+
+        if committed:
+            self.pending_commits.append(committed)
+            if (
+                len(self.pending_commits) >= self.CHECKPOINT_SEGMENTS
+                or time.monotonic() - self.last_checkpoint >= self.CHECKPOINT_SECONDS
+            ):
+                await self.checkpoint()
+
+        if committed or tentative:
+            await self.send(json.dumps({
+                "type": "transcript",
+                "commit": committed,
+                "tentative": tentative,
+                "stats": self.gate.stats,
+            }))
+        return True
+
+    async def send_cadence(self):
+        await self.send(json.dumps({"type": "cadence", "interval": self.cadence.interval}))
+
+    async def checkpoint(self):
+        if not self.session or not self.pending_commits:
+            return
+        text = " ".join(self.pending_commits)
+        self.pending_commits = []
+        self.last_checkpoint = time.monotonic()
+        await self.append_to_session(text, self.session_offset + self.transcript.committed_until)
+
+    async def close_session(self, title, text=None):
+        """
+        Saves the session as a live note. `text` is the client's final transcript,
+        which may carry edits or an enhancement; without it the server's own is used.
+        """
+        if not self.session:
+            await self.send(json.dumps({"type": "error", "message": "Sign in to save live notes"}))
+            return
+        if not title:
+            await self.send(json.dumps({"type": "error", "message": "Note title is required"}))
+            return
+
+        if not isinstance(text, str) or not text.strip():
+            text = self.transcript.text
+        note_id = await self.save_session_note(title, text)
+        if not note_id:
+            await self.send(json.dumps({
+                "type": "error",
+                "message": "A note with this title already exists in your records"
+            }))
+            return
+
+        await self.send(json.dumps({"type": "closed", "note_id": str(note_id)}))
+
+        # Anything said after this goes to a fresh session on the same socket
+        self.pending_commits = []
+        self.transcript.committed = []
+        self.session = await self.open_session(None)
+        # Its covered audio is counted from this point of the connection
+        self.session_offset = -self.transcript.committed_until
+        await self.send(json.dumps({
+            "type": "session",
+            "id": str(self.session.id),
+            "transcript": self.session.transcript,
+        }))
+
+    @database_sync_to_async
+    def open_session(self, session_id):
+        if session_id:
+            try:
+                return LiveTranscriptionSession.objects.get(id=session_id, user=self.user, status="active")
+            except (LiveTranscriptionSession.DoesNotExist, ValidationError):
+                pass
+        return LiveTranscriptionSession.objects.create(user=self.user)
+
+    @database_sync_to_async
+    def append_to_session(self, text, committed_until):
+        # Append in the database so the row is never read back and rewritten
+        LiveTranscriptionSession.objects.filter(id=self.session.id).update(
+            transcript=Concat("transcript", Value(" " + text)),
+            committed_until=committed_until,
+        )
+
+    @database_sync_to_async
+    def save_session_note(self, title, text):
+        """ Turns the whole session into one live note; pending batches never hit the session row. """
+        if Notes.objects.filter(user=self.user, type="live", title=title).exists():
+            return None
+
+        with transaction.atomic():
+            note = Notes.objects.create(
+                user=self.user,
+                type="live",
+                title=title,
+                transcript_text=text.strip(),
             )
-            return result.get("text", "").strip()
-        except Exception as e:
-            print("Whisper error:", e)
-            return ""
+            LiveTranscriptionSession.objects.filter(id=self.session.id).update(status="closed", note=note)
+        return note.id
+
+
+class UploadProgressConsumer(AsyncWebsocketConsumer):
+    async def connect(self):
+        self.media_id = self.scope["url_route"]["kwargs"]["media_id"]
+        self.room_group_name = f"upload_{self.media_id}"
+        self.user = self.scope["user"]
+
+        if not self.user or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        if not await self.owns_upload():
+            await self.close()
+            return
+
+        # Join first so nothing pushed between the snapshot and the join is missed
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.accept()
+
+        await self.send(text_data=json.dumps({
+            "type": "snapshot",
+            **await self.get_snapshot(),
+        }))
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+
+    async def upload_segments(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "segments",
+            "chunk": event["chunk"],
+            "segments": event["segments"],
+            "progress": event["progress"],
+        }))
+
+    async def upload_done(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "done",
+            "progress": 100,
+            "transcript": event["transcript"],
+        }))
+
+    async def upload_failed(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "failed",
+            "message": event["message"],
+        }))
+
+    @database_sync_to_async
+    def owns_upload(self):
+        return UploadTranscription.objects.filter(id=self.media_id, user=self.user).exists()
+
+    @database_sync_to_async
+    def get_snapshot(self):
+        media = UploadTranscription.objects.get(id=self.media_id)
+        return {
+            "status": media.status,
+            "progress": media.progress,
+            "transcript": media.transcript,
+            "segments": list(media.segments.values("chunk", "start", "end", "text")),
+        }
+
+
+class EnhancementConsumer(AsyncWebsocketConsumer):
+    """ Tells the owner when a background note enhancement has finished. """
+
+    async def connect(self):
+        self.enhancement_id = self.scope["url_route"]["kwargs"]["enhancement_id"]
+        self.room_group_name = f"enhance_{self.enhancement_id}"
+        self.user = self.scope["user"]
+
+        if not self.user or not self.user.is_authenticated:
+            await self.close()
+            return
+
+        if not await self.owns_enhancement():
+            await self.close()
+            return
+
+        # Join first so a result pushed between the snapshot and the join is not missed
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.accept()
+
+        snapshot = await self.get_snapshot()
+        if snapshot["status"] in ("done", "failed"):
+            await self.send(text_data=json.dumps({"type": "done", **snapshot}))
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+
+    async def enhance_done(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "done",
+            "status": event["status"],
+            "enhanced_text": event["enhanced_text"],
+            "error": event["error"],
+        }))
+
+    @database_sync_to_async
+    def owns_enhancement(self):
+        return NoteEnhancement.objects.filter(id=self.enhancement_id, user=self.user).exists()
+
+    @database_sync_to_async
+    def get_snapshot(self):
+        return NoteEnhancement.objects.filter(id=self.enhancement_id).values("status", "enhanced_text", "error").get()
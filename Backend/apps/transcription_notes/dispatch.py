@@ -0,0 +1,137 @@
+from collections import defaultdict, deque
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from apps.accounts.models import UserCredits
+from .models import UploadTranscription
+
+# pg_advisory_xact_lock key held by whichever dispatcher is counting slots
+DISPATCH_LOCK = 0x7472616E73
+
+
+def queue_for(media, paid):
+    """
+    Celery queue by plan and job size, e.g. transcribe_paid_short. Without
+    TRANSCRIPTION_DEDICATED_QUEUES everything goes to the default queue, which a
+    plain `celery worker` consumes.
+    """
+    if not settings.TRANSCRIPTION_DEDICATED_QUEUES:
+        return ""
+    try:
+        size = "long" if media.file.size > settings.TRANSCRIPTION_LONG_UPLOAD_SIZE else "short"
+    except OSError:
+        size = "short"
+    return f"transcribe_{'paid' if paid else 'free'}_{size}"
+
+
+def _stale_before():
+    return timezone.now() - timedelta(seconds=settings.TRANSCRIPTION_JOB_TIMEOUT)
+
+
+def active_jobs():
+    # Jobs stuck past the timeout (worker died, message lost) stop holding a slot
+    stale_before = _stale_before()
+    return UploadTranscription.objects.filter(
+        Q(status="queued", queued_at__gt=stale_before) | Q(status="processing", started_at__gt=stale_before)
+    )
+
+
+def stale_jobs():
+    """ The queued/processing jobs active_jobs() no longer counts; nothing is coming to finish them. """
+    stale_before = _stale_before()
+    return UploadTranscription.objects.filter(
+        Q(status="queued", queued_at__lte=stale_before) | Q(status="processing", started_at__lte=stale_before)
+    )
+
+
+def pick_jobs():
+    """
+    Moves pending uploads to `queued` and returns them. Users are served
+    weighted-fair (fewest running jobs per unit of weight goes next, paid users
+    weigh more), nobody exceeds the per-user cap, and the total in flight is
+    bounded so the backlog waits here rather than in a FIFO broker queue.
+    """
+    with transaction.atomic():
+        # Dispatch runs on upload, on completion and on beat; without one lock around
+        # the count, two runs could both fill the same free slots
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [DISPATCH_LOCK])
+
+        running = defaultdict(int, active_jobs().values("user_id").annotate(n=Count("id")).values_list("user_id", "n"))
+        free_slots = settings.TRANSCRIPTION_MAX_IN_FLIGHT - sum(running.values())
+        if free_slots <= 0:
+            return []
+
+        pending = list(
+            UploadTranscription.objects
+            .select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .order_by("created_at")[:500]
+        )
+        paid_users = set(
+            UserCredits.objects
+            .filter(user_id__in={media.user_id for media in pending}, remaining_credits__gt=0)
+            .values_list("user_id", flat=True)
+        )
+
+        waiting = defaultdict(deque)
+        for media in pending:
+            waiting[media.user_id].append(media)
+
+        def weight(user_id):
+            return settings.TRANSCRIPTION_PAID_WEIGHT if user_id in paid_users else 1
+
+        picked = []
+        while free_slots and waiting:
+            user_id = min(waiting, key=lambda u: (running[u] / weight(u), waiting[u][0].created_at))
+            if running[user_id] >= settings.TRANSCRIPTION_USER_CONCURRENCY:
+                del waiting[user_id]
+                continue
+
+            media = waiting[user_id].popleft()
+            if not waiting[user_id]:
+                del waiting[user_id]
+
+            media.status = "queued"
+            media.queue = queue_for(media, user_id in paid_users)
+            media.queued_at = timezone.now()
+            running[user_id] += 1
+            free_slots -= 1
+            picked.append(media)
+
+        UploadTranscription.objects.bulk_update(picked, ["status", "queue", "queued_at"])
+    return picked
+
+
+def queue_stats():
+    """ Depth and wait times per queue for the admin dashboard. """
+    now = timezone.now()
+    since = now - timedelta(hours=1)
+    stats = {}
+
+    for row in active_jobs().filter(status="queued").values("queue").annotate(depth=Count("id")):
+        stats.setdefault(row["queue"], {})["depth"] = row["depth"]
+
+    started = UploadTranscription.objects.filter(started_at__gte=since).values("queue", "created_at", "started_at")
+    waits = defaultdict(list)
+    for row in started:
+        waits[row["queue"]].append((row["started_at"] - row["created_at"]).total_seconds())
+
+    for queue, values in waits.items():
+        values.sort()
+        stats.setdefault(queue, {}).update({
+            "started_last_hour": len(values),
+            "avg_wait_seconds": round(sum(values) / len(values), 1),
+            "p95_wait_seconds": round(values[int(0.95 * (len(values) - 1))], 1),
+        })
+
+    oldest = UploadTranscription.objects.filter(status="pending").order_by("created_at").first()
+    return {
+        "pending": UploadTranscription.objects.filter(status="pending").count(),
+        "oldest_pending_seconds": round((now - oldest.created_at).total_seconds(), 1) if oldest else 0,
+        "in_flight": active_jobs().count(),
+        "max_in_flight": settings.TRANSCRIPTION_MAX_IN_FLIGHT,
+        "queues": stats,
+    }
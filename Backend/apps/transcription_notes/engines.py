@@ -0,0 +1,262 @@
+import logging
+from django.conf import settings
+from .audio import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Whisper's context window; longer audio is transcribed window by window
+MAX_WINDOW_SECONDS = 30
+
+
+class TranscriptionEngine:
+    """
+    One loaded speech-to-text model. Every backend returns the same schema: a list of
+    {"start", "end", "text", "words"} segments in seconds from the start of the audio,
+    where words is a list of {"word", "start", "end"} (empty unless asked for).
+    """
+
+    name = None
+
+    def transcribe(self, audio, language=None, word_timestamps=False, no_speech_threshold=0.6):
+        raise NotImplementedError
+
+    def transcribe_batch(self, windows, language=None, no_speech_threshold=0.6):
+        """ Several float32 windows at once. Backends without batching run them in turn. """
+        return [
+            self.transcribe(audio, language=language, no_speech_threshold=no_speech_threshold)
+            for audio in windows
+        ]
+
+
+class WhisperEngine(TranscriptionEngine):
+    """ Reference openai-whisper on PyTorch. """
+
+    name = "whisper"
+
+    def __init__(self, model_name, device, compute_type):
+        import whisper
+
+        self.model = whisper.load_model(model_name, device=device)
+        self.fp16 = compute_type == "float16"
+
+    def transcribe(self, audio, language=None, word_timestamps=False, no_speech_threshold=0.6):
+        result = self.model.transcribe(
+            audio,
+            fp16=self.fp16,
+            language=language,
+            word_timestamps=word_timestamps,
+            no_speech_threshold=no_speech_threshold,
+        )
+        return [
+            {
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": seg["text"].strip(),
+                "words": [
+                    {"word": word["word"], "start": word["start"], "end": word["end"]}
+                    for word in seg.get("words", [])
+                ],
+            }
+            for seg in result.get("segments", [])
+        ]
+
+    def transcribe_batch(self, windows, language=None, no_speech_threshold=0.6):
+        """ Short windows share one padded forward pass; long ones go through transcribe(). """
+        import torch
+        import whisper
+        from whisper.audio import N_SAMPLES
+
+        model = self.model
+        results = [None] * len(windows)
+        short = [i for i, audio in enumerate(windows) if len(audio) <= N_SAMPLES]
+
+        if short:
+            mel = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(windows[i]), model.dims.n_mels)
+                for i in short
+            ]).to(model.device)
+            decoded = whisper.decode(model, mel, whisper.DecodingOptions(
+                language=language,
+                fp16=self.fp16,
+                without_timestamps=False,
+            ))
+            tokenizer = whisper.tokenizer.get_tokenizer(
+                model.is_multilingual,
+                num_languages=model.num_languages,
+                language=language,
+                task="transcribe",
+            )
+
+            for i, result in zip(short, decoded):
+                # Same silence rule model.transcribe applies per window
+                if result.no_speech_prob > no_speech_threshold and result.avg_logprob < -1.0:
+                    results[i] = []
+                    continue
+                results[i] = _segments_from_tokens(result.tokens, tokenizer, len(windows[i]) / SAMPLE_RATE)
+
+        for i, audio in enumerate(windows):
+            if results[i] is None:
+                results[i] = self.transcribe(audio, language=language, no_speech_threshold=no_speech_threshold)
+        return results
+
+
+def _segments_from_tokens(tokens, tokenizer, duration):
+    """ Splits a decoded token sequence on its timestamp tokens. """
+    segments = []
+    seg_start = None
+    text_tokens = []
+
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            stamp = (token - tokenizer.timestamp_begin) * 0.02
+            if seg_start is None:
+                seg_start = stamp
+                continue
+            if text_tokens:
+                segments.append({
+                    "start": seg_start,
+                    "end": stamp,
+                    "text": tokenizer.decode(text_tokens).strip(),
+                    "words": [],
+                })
+            seg_start = None
+            text_tokens = []
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+
+    # The model ran out of audio before closing the last segment
+    if text_tokens:
+        segments.append({
+            "start": seg_start or 0.0,
+            "end": duration,
+            "text": tokenizer.decode(text_tokens).strip(),
+            "words": [],
+        })
+    return segments
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """ CTranslate2 through faster-whisper; int8 on CPU is several times cheaper than PyTorch fp32. """
+
+    name = "faster-whisper"
+
+    def __init__(self, model_name, device, compute_type, cpu_threads=0):
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+    def transcribe(self, audio, language=None, word_timestamps=False, no_speech_threshold=0.6):
+        segments, _ = self.model.transcribe(
+            audio,
+            language=language,
+            word_timestamps=word_timestamps,
+            no_speech_threshold=no_speech_threshold,
+            beam_size=1,
+            # Live windows overlap, so earlier text must not steer the next window
+            condition_on_previous_text=False,
+        )
+        # segments is a generator; decoding happens while it is consumed
+        return [
+            {
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text.strip(),
+                "words": [
+                    {"word": word.word, "start": word.start, "end": word.end}
+                    for word in (seg.words or [])
+                ],
+            }
+            for seg in segments
+        ]
+
+
+class OnnxEngine(TranscriptionEngine):
+    """
+    Whisper exported to ONNX and run by ONNX Runtime via optimum. WHISPER_ONNX_PATH
+    points at an exported (optionally int8-quantized) model directory; without it the
+    Hugging Face checkpoint is exported on first load.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_name, device, compute_type, model_path=""):
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        from transformers import AutoProcessor, pipeline
+
+        source = model_path or f"openai/whisper-{model_name}"
+        model = ORTModelForSpeechSeq2Seq.from_pretrained(source, export=not model_path)
+        processor = AutoProcessor.from_pretrained(source)
+        self.pipe = pipeline(
+            "automatic-speech-recognition",
+            model=model,
+            tokenizer=processor.tokenizer,
+            feature_extractor=processor.feature_extractor,
+            chunk_length_s=MAX_WINDOW_SECONDS,
+        )
+
+    @staticmethod
+    def _generate_kwargs(language):
+        return {"language": language, "task": "transcribe"} if language else {"task": "transcribe"}
+
+    @staticmethod
+    def _segments(result, duration):
+        # The last chunk can come back open-ended
+        return [
+            {
+                "start": chunk["timestamp"][0],
+                "end": chunk["timestamp"][1] or duration,
+                "text": chunk["text"].strip(),
+                "words": [],
+            }
+            for chunk in result.get("chunks", [])
+            if chunk["text"].strip()
+        ]
+
+    def transcribe(self, audio, language=None, word_timestamps=False, no_speech_threshold=0.6):
+        duration = len(audio) / SAMPLE_RATE
+        result = self.pipe(
+            audio,
+            return_timestamps="word" if word_timestamps else True,
+            generate_kwargs=self._generate_kwargs(language),
+        )
+        if not word_timestamps:
+            return self._segments(result, duration)
+
+        # Word-level output has no segment boundaries, so it comes back as one segment
+        words = [
+            {"word": chunk["text"], "start": chunk["timestamp"][0], "end": chunk["timestamp"][1] or duration}
+            for chunk in result.get("chunks", [])
+        ]
+        if not words:
+            return []
+        return [{"start": words[0]["start"], "end": words[-1]["end"], "text": result["text"].strip(), "words": words}]
+
+    def transcribe_batch(self, windows, language=None, no_speech_threshold=0.6):
+        results = self.pipe(
+            list(windows),
+            return_timestamps=True,
+            batch_size=len(windows),
+            generate_kwargs=self._generate_kwargs(language),
+        )
+        return [self._segments(result, len(audio) / SAMPLE_RATE) for audio, result in zip(windows, results)]
+
+
+ENGINES = {engine.name: engine for engine in (WhisperEngine, FasterWhisperEngine, OnnxEngine)}
+
+
+def load_engine(backend, model_name, device, compute_type):
+    if backend not in ENGINES:
+        raise ValueError(f"Unknown transcription engine {backend!r}, expected one of {', '.join(ENGINES)}")
+    if backend == "faster-whisper":
+        return FasterWhisperEngine(model_name, device, compute_type, cpu_threads=settings.WHISPER_CPU_THREADS)
+    if backend == "onnx":
+        return OnnxEngine(model_name, device, compute_type, model_path=settings.WHISPER_ONNX_PATH)
+    return ENGINES[backend](model_name, device, compute_type)
+
+
+def engine_version():
+    """ What produced a transcript; uploads only reuse a cached transcript from the same engine. """
+    if settings.TRANSCRIPTION_ENGINE == "whisper":
+        # Matches rows written before engines were configurable
+        return settings.WHISPER_MODEL
+    return f"{settings.TRANSCRIPTION_ENGINE}:{settings.WHISPER_MODEL}:{settings.WHISPER_COMPUTE_TYPE}"
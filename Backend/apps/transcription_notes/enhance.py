@@ -0,0 +1,81 @@
+import asyncio
+import re
+from django.conf import settings
+from apps.chat_bot.gemini_service import call_gemini, GEMINI_ERROR_PREFIXES
+from apps.chat_bot.http_client import close_session
+from apps.chat_bot.response_cache import ResponseCache, close_client
+
+# Exact matches only: a paraphrased transcript still needs its own clean-up
+enhance_cache = ResponseCache("enhance")
+
+PROMPT = (
+    "Enhance this transcribed data. Fix the grammatical errors, keep the same context, "
+    "but highly correct it and format it cleanly:\n\n{text}"
+)
+PART_PROMPT = (
+    "This is part {index} of {total} of a longer transcript. Enhance it. Fix the grammatical "
+    "errors, keep the same context, but highly correct it and format it cleanly. Return only "
+    "the enhanced text, with no introduction or closing remarks:\n\n{text}"
+)
+
+
+def split_transcript(text, max_chars):
+    """
+    Cuts a transcript into pieces of at most `max_chars`, preferring paragraph and
+    then sentence boundaries so no chunk starts mid-thought.
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            # A run-on sentence from speech-to-text can still be too long
+            pieces.extend(sentence[i:i + max_chars] for i in range(0, len(sentence), max_chars))
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def enhance_transcript(text):
+    """ Returns (enhanced text, chunk count, error). Chunks go to Gemini concurrently and are joined in order. """
+    chunks = split_transcript(text, settings.ENHANCE_CHUNK_CHARS)
+    limit = asyncio.Semaphore(settings.ENHANCE_PARALLEL_CHUNKS)
+
+    async def enhance(index, chunk):
+        if len(chunks) == 1:
+            prompt = PROMPT.format(text=chunk)
+        else:
+            prompt = PART_PROMPT.format(index=index + 1, total=len(chunks), text=chunk)
+        cached = await enhance_cache.get(prompt)
+        if cached is not None:
+            return cached
+        async with limit:
+            # Nobody is waiting on a socket, so a job can queue behind live chat for longer
+            reply = await call_gemini(prompt, max_wait=settings.GEMINI_BACKGROUND_MAX_WAIT)
+        if not reply.startswith(GEMINI_ERROR_PREFIXES):
+            await enhance_cache.set(prompt, reply)
+        return reply
+
+    try:
+        replies = await asyncio.gather(*(enhance(i, chunk) for i, chunk in enumerate(chunks)))
+    finally:
+        # The Celery task's event loop ends with this call, so its pooled connections go too
+        await close_session()
+        await close_client()
+
+    for reply in replies:
+        if reply.startswith(GEMINI_ERROR_PREFIXES):
+            return "", len(chunks), reply
+    return "\n\n".join(reply.strip() for reply in replies), len(chunks), ""
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import os
+import resource
+import statistics
+import time
+import tracemalloc
+from unittest import mock
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from apps.transcription_notes import consumers
+from apps.transcription_notes.audio import SAMPLE_RATE
+from apps.transcription_notes.routing import websocket_urlpatterns
+
+
+class StubScheduler:
+    """ Stands in for the model pool: fixed latency, one segment per window. """
+
+    # Never queues, so the cadence controller only sees the latency
+    load = 0.0
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def transcribe(self, audio, start):
+        await asyncio.sleep(self.latency)
+        return [{"start": start, "end": start + len(audio) / SAMPLE_RATE, "text": "stub"}]
+
+
+def anonymous(app):
+    async def wrapper(scope, receive, send):
+        return await app(dict(scope, user=AnonymousUser()), receive, send)
+    return wrapper
+
+
+def load_chunks(source, chunk_bytes):
+    """ A directory of recorded MediaRecorder chunks (sorted by name), or one file cut into pieces. """
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source) if not name.startswith("."))
+        chunks = []
+        for name in names:
+            with open(os.path.join(source, name), "rb") as f:
+                chunks.append(f.read())
+        return chunks
+
+    with open(source, "rb") as f:
+        data = f.read()
+    return [data[i:i + chunk_bytes] for i in range(0, len(data), chunk_bytes)]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays recorded WebM chunk streams from N simulated clients against "
+        "ws/live-transcribe/ in-process and reports latency, CPU and memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="WebM file, or directory of recorded chunk files")
+        parser.add_argument("--clients", type=int, default=10)
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds between chunks per client")
+        parser.add_argument("--chunk-bytes", type=int, default=16000, help="Chunk size when SOURCE is a single file")
+        parser.add_argument("--audio-seconds-per-chunk", type=float, default=1.0)
+        parser.add_argument("--stub", action="store_true", help="Skip Whisper; answer every window after --stub-latency")
+        parser.add_argument("--stub-latency", type=float, default=0.2)
+        parser.add_argument("--drain", type=float, default=5.0, help="Seconds to wait for trailing frames")
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options["source"]):
+            raise CommandError(f"{options['source']} does not exist")
+
+        chunks = load_chunks(options["source"], options["chunk_bytes"])
+        if not chunks:
+            raise CommandError("No audio chunks to replay")
+
+        patches = []
+        if options["stub"]:
+            patches.append(mock.patch.object(consumers, "get_scheduler", lambda: StubScheduler(options["stub_latency"])))
+
+        for patch in patches:
+            patch.start()
+        try:
+            results, memory = asyncio.run(self.run(chunks, options))
+        finally:
+            for patch in patches:
+                patch.stop()
+            if not options["stub"]:
+                from apps.transcription_notes.model_pool import get_pool
+                # Joined pool workers show up in RUSAGE_CHILDREN
+                get_pool().shutdown(wait=True)
+
+        self.report(results, memory, len(chunks), options)
+
+    async def run(self, chunks, options):
+        app = anonymous(URLRouter(websocket_urlpatterns))
+        self.usage_before = (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN))
+        self.started = time.perf_counter()
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        memory = {}
+
+        async def sample_memory():
+            # Half way through, every client is connected and holds a full-ish buffer
+            await asyncio.sleep(len(chunks) * options["interval"] / 2)
+            memory["mid"] = tracemalloc.get_traced_memory()[0] - baseline
+
+        sampler = asyncio.create_task(sample_memory())
+        results = await asyncio.gather(*(
+            self.client(app, chunks, options) for _ in range(options["clients"])
+        ))
+        sampler.cancel()
+        memory["peak"] = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+
+        self.elapsed = time.perf_counter() - self.started
+        return results, memory
+
+    async def client(self, app, chunks, options):
+        communicator = WebsocketCommunicator(app, "/ws/live-transcribe/")
+        connected, _ = await communicator.connect()
+        if not connected:
+            raise CommandError("Consumer refused the connection")
+
+        opened = time.perf_counter()
+        state = {"last_sent": None, "first_text": None, "latencies": [], "busy": 0}
+
+        async def listen():
+            # Read the queue directly: receive_from's timeout cancels the application
+            while True:
+                message = await communicator.output_queue.get()
+                if message.get("type") != "websocket.send" or not message.get("text"):
+                    continue
+                frame = json.loads(message["text"])
+                now = time.perf_counter()
+                if frame.get("type") == "busy":
+                    state["busy"] += 1
+                elif frame.get("type") == "transcript" and state["last_sent"] is not None:
+                    if state["first_text"] is None:
+                        state["first_text"] = now - opened
+                    # Time since the newest chunk the update could have included
+                    state["latencies"].append(now - state["last_sent"])
+
+        listener = asyncio.create_task(listen())
+        for chunk in chunks:
+            await communicator.send_to(bytes_data=chunk)
+            state["last_sent"] = time.perf_counter()
+            await asyncio.sleep(options["interval"])
+
+        await asyncio.sleep(options["drain"])
+        listener.cancel()
+        await communicator.disconnect()
+        return state
+
+    def report(self, results, memory, chunk_count, options):
+        self_before, children_before = self.usage_before
+        self_after = resource.getrusage(resource.RUSAGE_SELF)
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = (
+            (self_after.ru_utime + self_after.ru_stime) - (self_before.ru_utime + self_before.ru_stime)
+            + (children_after.ru_utime + children_after.ru_stime) - (children_before.ru_utime + children_before.ru_stime)
+        )
+
+        clients = len(results)
+        audio_seconds = clients * chunk_count * options["audio_seconds_per_chunk"]
+        first_texts = [r["first_text"] for r in results if r["first_text"] is not None]
+        latencies = [latency for r in results for latency in r["latencies"]]
+
+        def fmt(value, unit="s"):
+            return "-" if value is None else f"{value:.3f}{unit}"
+
+        self.stdout.write(f"clients: {clients}, chunks each: {chunk_count}, wall: {self.elapsed:.1f}s"
+                          f"{' (stub model)' if options['stub'] else ''}")
+        self.stdout.write(f"time to first text: p50 {fmt(percentile(first_texts, 50))}, "
+                          f"max {fmt(max(first_texts) if first_texts else None)}, "
+                          f"{clients - len(first_texts)} clients got none")
+        self.stdout.write(f"update latency: p50 {fmt(percentile(latencies, 50))}, "
+                          f"p90 {fmt(percentile(latencies, 90))}, p99 {fmt(percentile(latencies, 99))}, "
+                          f"mean {fmt(statistics.mean(latencies) if latencies else None)} over {len(latencies)} updates")
+        self.stdout.write(f"busy frames: {sum(r['busy'] for r in results)}")
+        self.stdout.write(f"cpu: {cpu:.2f}s total, {cpu / audio_seconds * 1000:.1f}ms per audio-second")
+        self.stdout.write(f"python memory per connection: mid-run {memory.get('mid', 0) / clients / 1024:.0f}KiB, "
+                          f"peak {memory['peak'] / clients / 1024:.0f}KiB")
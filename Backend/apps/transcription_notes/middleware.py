@@ -0,0 +1,69 @@
+import json
+from django.conf import settings
+
+UPLOAD_PATH_PREFIX = "/api/transcription-notes/upload/"
+# Room for multipart boundaries and form fields around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps upload request bodies at the ASGI layer. Django's ASGI handler spools
+    the whole body to a temporary file before any view or upload handler runs,
+    so a limit checked there only fires after the bytes have arrived. Here a
+    declared Content-Length over the limit is refused before anything is read,
+    and a body without one is cut off once it crosses the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(UPLOAD_PATH_PREFIX):
+            return await self.app(scope, receive, send)
+
+        limit = settings.TRANSCRIPTION_MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD
+        headers = dict(scope.get("headers", []))
+        declared = headers.get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > limit:
+            return await self.reject(headers, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise BodyTooLarge()
+            return message
+
+        try:
+            await self.app(scope, limited_receive, send)
+        except BodyTooLarge:
+            # Raised while Django reads the body, before any response has started
+            await self.reject(headers, send)
+
+    async def reject(self, headers, send):
+        max_mb = settings.TRANSCRIPTION_MAX_UPLOAD_SIZE // (1024 * 1024)
+        body = json.dumps({"file": [f"Max file size is {max_mb}MB"]}).encode()
+        response_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"connection", b"close"),
+        ]
+        # The CORS middleware never runs for this response, so the browser would only see a network error
+        origin = headers.get(b"origin", b"")
+        if origin.decode() in settings.CORS_ALLOWED_ORIGINS:
+            response_headers += [
+                (b"access-control-allow-origin", origin),
+                (b"access-control-allow-credentials", b"true"),
+            ]
+
+        await send({"type": "http.response.start", "status": 413, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body})
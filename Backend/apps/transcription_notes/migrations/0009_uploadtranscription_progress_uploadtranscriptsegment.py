@@ -0,0 +1,43 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_notes', '0008_alter_notes_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadtranscription',
+            name='segments_done',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='uploadtranscription',
+            name='segments_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='uploadtranscription',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done')], default='pending', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='UploadTranscriptSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chunk', models.PositiveIntegerField()),
+                ('start', models.FloatField()),
+                ('end', models.FloatField()),
+                ('text', models.TextField()),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='transcription_notes.uploadtranscription')),
+            ],
+            options={
+                'ordering': ['start'],
+            },
+        ),
+    ]
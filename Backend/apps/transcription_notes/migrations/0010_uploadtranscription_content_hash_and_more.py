@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_notes', '0009_uploadtranscription_progress_uploadtranscriptsegment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadtranscription',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uploadtranscription',
+            name='model_version',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-18 12:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_notes', '0011_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('segments', models.BinaryField()),
+                ('words', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('upload', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='index', to='transcription_notes.uploadtranscription')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_notes', '0015_noteenhancement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadtranscription',
+            name='chunks_done',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='uploadtranscription',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
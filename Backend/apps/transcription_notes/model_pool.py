@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Set once per worker process by _init_worker.
+_engine = None
+
+
+class PoolBusy(Exception):
+    """ Raised when the pool already has as many jobs in flight as it accepts. """
+
+
+def _init_worker(model_name):
+    global _engine
+    from .model_registry import get_engine
+
+    _engine = get_engine(model_name)
+    logger.info(f"Transcription replica ready ({_engine.name} {model_name})")
+
+
+def _ping():
+    return _engine is not None
+
+
+def _shift(segments, start):
+    """ Moves window-relative engine output onto session time. """
+    return [
+        {"start": start + seg["start"], "end": start + seg["end"], "text": seg["text"]}
+        for seg in segments
+    ]
+
+
+def run_transcription(audio, start, options):
+    """ Transcribes a float32 PCM window that begins at `start` session seconds. """
+    try:
+        return _shift(_engine.transcribe(audio, **options), start)
+    except Exception as e:
+        logger.error(f"Transcription error: {e}")
+        return None
+
+
+def run_transcription_batch(windows, options):
+    """ Transcribes several (audio, start) windows in one engine call where the backend can batch. """
+    try:
+        results = _engine.transcribe_batch([audio for audio, _ in windows], **options)
+    except Exception as e:
+        logger.error(f"Batch transcription error: {e}")
+        return [None] * len(windows)
+    return [_shift(segments, start) for segments, (_, start) in zip(results, windows)]
+
+
+class ModelPool:
+    """
+    A fixed number of transcription engine replicas living in worker processes.
+    Jobs beyond `max_pending` are refused with PoolBusy instead of queueing forever.
+    If a worker dies the executor is rebuilt, so one crash does not end live
+    transcription for the rest of the process.
+    """
+
+    def __init__(self, size, max_pending, model_name):
+        self.size = size
+        self.max_pending = max_pending
+        self.model_name = model_name
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._executor is not None:
+                return
+            # spawn keeps torch state out of the Daphne process
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name,),
+            )
+        # One ping per replica so every model is loaded before the first socket needs it
+        for _ in range(self.size):
+            self._executor.submit(_ping)
+
+    @property
+    def pending(self):
+        return self._pending
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PoolBusy()
+            self._pending += 1
+
+        executor = None
+        try:
+            if self._executor is None:
+                self.start()
+            executor = self._executor
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM while loading a replica); this executor never recovers
+            logger.error("Transcription worker died, restarting the model pool")
+            self._restart(executor)
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _restart(self, broken):
+        with self._lock:
+            # Every job on the broken executor fails at once; only the first rebuilds it
+            if broken is None or self._executor is not broken:
+                return
+            self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ModelPool(
+                size=settings.WHISPER_POOL_SIZE,
+                max_pending=settings.WHISPER_POOL_QUEUE,
+                model_name=settings.WHISPER_MODEL,
+            )
+    return _pool
@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from .engines import load_engine
+
+logger = logging.getLogger(__name__)
+
+
+def _label(key):
+    return "/".join(key)
+
+
+class ModelRegistry:
+    """
+    Process-wide transcription engines keyed by (backend, size, device, compute type),
+    least recently used evicted first.
+    """
+
+    def __init__(self, max_models):
+        self.max_models = max_models
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load_seconds = {}
+
+    def get(self, backend, name, device, compute_type):
+        key = (backend, name, device, compute_type)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key]
+
+            self.misses += 1
+            started = time.perf_counter()
+            model = load_engine(backend, name, device, compute_type)
+            self.load_seconds[key] = round(time.perf_counter() - started, 2)
+            logger.info(f"Loaded {_label(key)} in {self.load_seconds[key]}s")
+
+            self._models[key] = model
+            while len(self._models) > self.max_models:
+                evicted, _ = self._models.popitem(last=False)
+                logger.info(f"Evicted {_label(evicted)}")
+            return model
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "loaded": [_label(key) for key in self._models],
+            "load_seconds": {_label(key): secs for key, secs in self.load_seconds.items()},
+        }
+
+
+_registry = None
+
+
+def get_engine(name=None, device=None, backend=None, compute_type=None):
+    """ The configured engine unless told otherwise; see TRANSCRIPTION_ENGINE in settings. """
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(max_models=settings.WHISPER_REGISTRY_SIZE)
+    return _registry.get(
+        backend or settings.TRANSCRIPTION_ENGINE,
+        name or settings.WHISPER_MODEL,
+        device or settings.WHISPER_DEVICE,
+        compute_type or settings.WHISPER_COMPUTE_TYPE,
+    )
+
+
+def registry_stats():
+    return _registry.stats if _registry else {}
@@ -9,12 +9,66 @@ class UploadTranscription(models.Model):
         related_name="upload_Transcription" 
     )
     file = models.FileField(upload_to="upload_transcription_files/")
+    # sha256 of the uploaded bytes; identical uploads share one stored file and transcript
+    content_hash = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    model_version = models.CharField(max_length=50, blank=True, default="")
     transcript = models.TextField(blank=True, null=True)
     status = models.CharField(
         max_length=20,
-        choices=[("pending", "Pending"), ("done", "Done")],
+        choices=[
+            ("pending", "Pending"), ("queued", "Queued"), ("processing", "Processing"),
+            ("done", "Done"), ("failed", "Failed"),
+        ],
         default="pending",
     )
+    # Celery queue the job was routed to, and when it left the fair queue / a worker picked it up
+    queue = models.CharField(max_length=50, blank=True, default="")
+    queued_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    segments_total = models.PositiveIntegerField(default=0)
+    segments_done = models.PositiveIntegerField(default=0)
+    # Chunk indexes already counted in segments_done, so a retried chunk is not counted twice
+    chunks_done = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def progress(self):
+        if self.status == "done":
+            return 100
+        if not self.segments_total:
+            return 0
+        return int(self.segments_done * 100 / self.segments_total)
+
+class UploadTranscriptSegment(models.Model):
+    upload = models.ForeignKey(UploadTranscription, on_delete=models.CASCADE, related_name="segments")
+    # Index of the parallel chunk this segment came from
+    chunk = models.PositiveIntegerField()
+    start = models.FloatField()
+    end = models.FloatField()
+    text = models.TextField()
+
+    class Meta:
+        ordering = ["start"]
+
+class TranscriptIndex(models.Model):
+    """
+    Segment and word timings for an upload's transcript, packed column-wise
+    (see transcript_index.py) so a time window can be sliced without loading rows.
+    """
+    upload = models.OneToOneField(UploadTranscription, on_delete=models.CASCADE, related_name="index")
+    segments = models.BinaryField()
+    words = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class UploadSession(models.Model):
+    """ A resumable upload that is still receiving chunks. """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
 class Notes(models.Model):
@@ -52,4 +106,40 @@ class LiveTranscription(models.Model):
 
     def __str__(self):
         return f"{self.user} - {self.count}"
-    
\ No newline at end of file
+    
+class LiveTranscriptionSession(models.Model):
+    """
+    Checkpointed state of one live transcription, so a dropped socket can resume.
+    `transcript` only ever grows by appended batches of committed text.
+    """
+    STATUS_CHOICES = (
+        ("active", "Active"),
+        ("closed", "Closed"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="live_sessions")
+    transcript = models.TextField(blank=True, default="")
+    # Seconds of audio covered by `transcript`, across reconnects
+    committed_until = models.FloatField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="active")
+    note = models.ForeignKey(Notes, on_delete=models.SET_NULL, null=True, blank=True, related_name="live_sessions")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class NoteEnhancement(models.Model):
+    """ A background Gemini clean-up of a transcript; the client is notified when it finishes. """
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="note_enhancements")
+    source_text = models.TextField()
+    enhanced_text = models.TextField(blank=True, default="")
+    error = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    chunks = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
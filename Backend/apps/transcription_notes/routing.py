@@ -1,6 +1,8 @@
 from django.urls import re_path
-from .consumers import LiveTranscriptionConsumer
+from .consumers import LiveTranscriptionConsumer, UploadProgressConsumer, EnhancementConsumer
 
 websocket_urlpatterns = [
     re_path(r"^ws/live-transcribe/$", LiveTranscriptionConsumer.as_asgi()),
+    re_path(r"^ws/upload-transcription/(?P<media_id>\d+)/$", UploadProgressConsumer.as_asgi()),
+    re_path(r"^ws/enhance/(?P<enhancement_id>[0-9a-f-]+)/$", EnhancementConsumer.as_asgi()),
 ]
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import time
+from django.conf import settings
+from .model_pool import get_pool, run_transcription_batch, PoolBusy
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """
+    Collects pending windows from every live socket in this process and, once per
+    tick, hands them to the model pool as padded batches. Windows wait here while
+    all replicas are busy, so batches grow under load instead of piling up jobs.
+    """
+
+    def __init__(self, pool, max_batch, tick, max_queued, options):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.tick = tick
+        self.max_queued = max_queued
+        self.options = options
+        self.queue = []
+        self.in_flight = 0
+        # Smoothed seconds from submitting a window to getting its segments back
+        self.latency = 0.0
+        self._task = None
+
+    @property
+    def load(self):
+        """ How full the wait queue is, 0 to 1. """
+        return len(self.queue) / self.max_queued if self.max_queued else 0.0
+
+    async def transcribe(self, audio, start):
+        if len(self.queue) >= self.max_queued:
+            raise PoolBusy()
+
+        future = asyncio.get_running_loop().create_future()
+        # The socket keeps writing into the ring the window came from while it waits
+        # here and while the pool pickles it, so it is queued as a copy
+        self.queue.append((audio.copy(), start, future))
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        submitted = time.monotonic()
+        try:
+            return await future
+        finally:
+            self.latency = 0.8 * self.latency + 0.2 * (time.monotonic() - submitted)
+
+    async def _run(self):
+        while self.queue:
+            await asyncio.sleep(self.tick)
+            while self.queue and self.in_flight < self.pool.size:
+                batch = self.queue[:self.max_batch]
+                del self.queue[:self.max_batch]
+                self.in_flight += 1
+                asyncio.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        # Sockets that went away while queued do not need a result
+        batch = [item for item in batch if not item[2].done()]
+
+        try:
+            if not batch:
+                return
+            windows = [(audio, start) for audio, start, _ in batch]
+            results = await self.pool.run(run_transcription_batch, windows, self.options)
+        except Exception as e:
+            if not isinstance(e, PoolBusy):
+                logger.error(f"Batch transcription failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.in_flight -= 1
+
+        for (_, _, future), segments in zip(batch, results):
+            if not future.done():
+                future.set_result(segments)
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = BatchScheduler(
+            pool=get_pool(),
+            max_batch=settings.WHISPER_BATCH_SIZE,
+            tick=settings.WHISPER_BATCH_TICK_MS / 1000,
+            max_queued=settings.WHISPER_POOL_QUEUE,
+            options={
+                "language": "en",
+                "no_speech_threshold": 0.6,
+            },
+        )
+    return _scheduler
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Notes, UploadTranscription
 
@@ -50,12 +51,15 @@ class NoteCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
     
 class MediaUploadSerializer(serializers.ModelSerializer):
+    progress = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = UploadTranscription
-        fields = ["id", "file", "status", "created_at", "transcript"] 
-        read_only_fields = ["status"]
+        fields = ["id", "file", "status", "progress", "created_at", "transcript"] 
+        read_only_fields = ["status", "progress"]
 
     def validate_file(self, file):
-        if file.size > 100 * 1024 * 1024:
-            raise serializers.ValidationError("Max file size is 100MB")
+        max_size = settings.TRANSCRIPTION_MAX_UPLOAD_SIZE
+        if file.size > max_size:
+            raise serializers.ValidationError(f"Max file size is {max_size // (1024 * 1024)}MB")
         return file
\ No newline at end of file
@@ -0,0 +1,54 @@
+class IncrementalTranscript:
+    """
+    Committed text plus a tentative tail for one live session.
+    Times are seconds on the session timeline. Only audio after
+    `committed_until` (minus a short overlap) needs decoding again.
+    """
+
+    def __init__(self, overlap=1.0, holdback=1.5, max_tentative=15.0):
+        self.overlap = overlap
+        self.holdback = holdback
+        self.max_tentative = max_tentative
+        self.committed_until = 0.0
+        self.committed = []
+        self.tentative = []
+
+    def window_start(self):
+        return max(0.0, self.committed_until - self.overlap)
+
+    def update(self, segments, window_end, final=False):
+        """
+        Folds a decoded window in and returns (newly committed text, tentative text).
+        `final` means the window ends at a speech boundary, so nothing in it can change.
+        """
+        stable_until = window_end if final else window_end - self.holdback
+        # Without a pause there is never a stable segment, so cap how long the tail can grow
+        if window_end - self.committed_until > self.max_tentative:
+            stable_until = max(stable_until, segments[-2]["end"] if len(segments) > 1 else 0.0)
+
+        fresh = [
+            seg for seg in segments
+            if seg["text"] and (seg["start"] + seg["end"]) / 2 >= self.committed_until
+        ]
+
+        new = []
+        while fresh and fresh[0]["end"] <= stable_until:
+            seg = fresh.pop(0)
+            new.append(seg["text"])
+            self.committed_until = seg["end"]
+
+        if final:
+            self.committed_until = max(self.committed_until, window_end)
+
+        self.committed.extend(new)
+        self.tentative = [seg["text"] for seg in fresh]
+        return " ".join(new), " ".join(self.tentative)
+
+    def skip_to(self, until):
+        """ Moves past audio known to hold no speech. """
+        if not self.tentative:
+            self.committed_until = max(self.committed_until, until)
+
+    @property
+    def text(self):
+        return " ".join(self.committed + self.tentative)
@@ -1,25 +1,258 @@
-import whisper
-from celery import shared_task
-from .models import UploadTranscription
+import os
+import time
+import asyncio
+import logging
+from datetime import timedelta
+import numpy as np
+from celery import shared_task, chord, group
+from celery.signals import worker_process_init
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import UploadTranscription, UploadTranscriptSegment, UploadSession, TranscriptIndex, NoteEnhancement
+from .enhance import enhance_transcript
+from .transcript_index import build_index
+from .dispatch import pick_jobs, stale_jobs
+from .model_registry import get_engine, registry_stats
+from .audio import SAMPLE_RATE, load_audio
+from .vad import split_at_silence
+
+logger = logging.getLogger(__name__)
+
+
+def _pcm_path(media):
+    # Deduplicated uploads share a file, so the scratch PCM is per job
+    return f"{media.file.path}.{media.id}.pcm.npy"
+
+
+def _remove_pcm(media):
+    pcm_path = _pcm_path(media)
+    if os.path.exists(pcm_path):
+        os.remove(pcm_path)
+
+
+def _push(group, event):
+    """ Sends an event to every socket watching this job. Clients can always catch up from the DB. """
+    try:
+        async_to_sync(get_channel_layer().group_send)(group, event)
+    except Exception as e:
+        logger.warning(f"Could not push {event['type']} to {group}: {e}")
+
+
+@worker_process_init.connect
+def preload_engine(**kwargs):
+    # Pay the model load once per worker process, not once per task
+    get_engine()
+
+
+def _fail_upload(media, message):
+    """ Ends a job as failed, tells any watching socket and drops its scratch audio. """
+    media.status = "failed"
+    media.finished_at = timezone.now()
+    media.save(update_fields=["status", "finished_at"])
+
+    _push(f"upload_{media.id}", {
+        "type": "upload.failed",
+        "message": message,
+    })
+
+    _remove_pcm(media)
+
+
+@shared_task
+def dispatch_transcriptions():
+    """ Starts whatever the fair scheduler allows; runs on upload, on completion and on beat. """
+    # Lost messages and dead workers leave jobs that would otherwise never finish
+    for media in stale_jobs():
+        logger.warning(f"Upload {media.id} timed out while {media.status}, marking it failed")
+        _fail_upload(media, "Transcription timed out. Please try uploading the file again.")
+
+    for media in pick_jobs():
+        # Covers the whole job: this task, every chord segment and the stitch
+        transcribe_media.apply_async(
+            (media.id,),
+            queue=media.queue or None,
+            link_error=transcription_failed.s(media.id),
+        )
+
+
+@shared_task
+def expire_upload_sessions():
+    """ Deletes resumable uploads nobody finished, and partial files an interrupted request left behind. """
+    # uploads imports this module
+    from .uploads import partial_dir, session_path
+
+    ttl = settings.TRANSCRIPTION_UPLOAD_SESSION_TTL
+    stale = UploadSession.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=ttl))
+    for session in stale:
+        path = session_path(session)
+        if os.path.exists(path):
+            os.remove(path)
+    expired, _ = stale.delete()
+
+    cutoff = time.time() - ttl
+    with os.scandir(partial_dir()) as entries:
+        for entry in entries:
+            if entry.name.endswith(".part") and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+    return expired
+
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=5, retry_kwargs={'max_retries': 3})
 def transcribe_media(self, media_id):
+    """ Decodes the upload once, splits it at pauses and fans the pieces out to workers. """
     media = UploadTranscription.objects.get(id=media_id)
     print("🚀 Transcription started")
 
-    # ✅ load model INSIDE task
-    model = whisper.load_model("tiny")  # 🔥 IMPORTANT
+    audio = load_audio(media.file.path)
+    np.save(_pcm_path(media), audio)
 
-    print("📦 Model loaded")
+    spans = split_at_silence(audio)
+    logger.info(f"Upload {media_id} split into {len(spans)} segments")
 
-    result = model.transcribe(
-        media.file.path,
-        fp16=False,
-        language="en"
-    )
+    media.status = "processing"
+    media.started_at = timezone.now()
+    media.segments_total = len(spans)
+    media.segments_done = 0
+    media.chunks_done = []
+    media.save(update_fields=["status", "started_at", "segments_total", "segments_done", "chunks_done"])
+    media.segments.all().delete()
+
+    # Segments stay on the job's queue so a free user's long upload can't spill into the paid workers
+    route = {"queue": media.queue} if media.queue else {}
+    chord(
+        group(
+            transcribe_segment.s(media_id, index, start, end).set(**route)
+            for index, (start, end) in enumerate(spans)
+        )
+    )(stitch_segments.s(media_id).set(**route).on_error(transcription_failed.s(media_id)))
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=5, retry_kwargs={'max_retries': 3})
+def transcribe_segment(self, media_id, index, start, end):
+    media = UploadTranscription.objects.get(id=media_id)
+
+    # Memory-mapped so each worker only reads its own slice
+    audio = np.load(_pcm_path(media), mmap_mode="r")
+    window = np.array(audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)])
+
+    result = get_engine().transcribe(window, language="en", word_timestamps=True)
+    logger.info(f"Segment {index} of upload {media_id} done, model cache: {registry_stats()}")
+
+    segments = [
+        {
+            "start": start + seg["start"],
+            "end": start + seg["end"],
+            "text": seg["text"],
+        }
+        for seg in result
+    ]
+    words = [
+        [
+            {"word": word["word"], "start": start + word["start"], "end": start + word["end"]}
+            for word in seg["words"]
+        ]
+        for seg in result
+    ]
+
+    # Persist and push this chunk straight away so clients see text before the whole file is done.
+    # A retry replaces the chunk's rows and is only counted once.
+    with transaction.atomic():
+        media = UploadTranscription.objects.select_for_update().get(id=media_id)
+        media.segments.filter(chunk=index).delete()
+        UploadTranscriptSegment.objects.bulk_create([
+            UploadTranscriptSegment(upload_id=media_id, chunk=index, **seg)
+            for seg in segments
+        ])
+        if index not in media.chunks_done:
+            media.chunks_done.append(index)
+            media.segments_done = len(media.chunks_done)
+            media.save(update_fields=["chunks_done", "segments_done"])
+
+    _push(f"upload_{media_id}", {
+        "type": "upload.segments",
+        "chunk": index,
+        "segments": segments,
+        "progress": media.progress,
+    })
+
+    return {
+        "index": index,
+        "segments": [{**seg, "words": seg_words} for seg, seg_words in zip(segments, words)],
+    }
+
+
+@shared_task
+def stitch_segments(results, media_id):
+    media = UploadTranscription.objects.get(id=media_id)
+
+    segments = [
+        seg
+        for part in sorted(results, key=lambda part: part["index"])
+        for seg in part["segments"]
+    ]
 
     print("✅ Transcription finished")
 
-    media.transcript = result["text"]
+    media.transcript, segment_columns, word_columns = build_index(segments)
     media.status = "done"
+    media.finished_at = timezone.now()
     media.save()
+    TranscriptIndex.objects.update_or_create(
+        upload=media,
+        defaults={"segments": segment_columns, "words": word_columns},
+    )
+
+    _push(f"upload_{media_id}", {
+        "type": "upload.done",
+        "transcript": media.transcript,
+    })
+
+    _remove_pcm(media)
+
+    # A slot just freed up
+    dispatch_transcriptions.delay()
+
+    return len(segments)
+
+
+@shared_task
+def transcription_failed(request, exc, traceback, media_id):
+    """ Error callback: a step ran out of retries, so the job ends as failed instead of processing forever. """
+    logger.error(f"Transcription of upload {media_id} failed: {exc}")
+
+    media = UploadTranscription.objects.get(id=media_id)
+    _fail_upload(media, "Transcription failed. Please try uploading the file again.")
+    dispatch_transcriptions.delay()
+
+
+@shared_task
+def enhance_note(enhancement_id):
+    """ Runs a note enhancement off the request thread; chunks of long transcripts go to Gemini in parallel. """
+    enhancement = NoteEnhancement.objects.get(id=enhancement_id)
+    enhancement.status = "processing"
+    enhancement.save(update_fields=["status"])
+
+    try:
+        enhanced_text, chunks, error = asyncio.run(enhance_transcript(enhancement.source_text))
+    except Exception as e:
+        # Still a finished job: the owner hears about it and the slot is freed
+        logger.error(f"Note enhancement {enhancement_id} failed: {e}")
+        enhanced_text, chunks, error = "", 0, "❌ Something went wrong. Please try again later."
+
+    enhancement.enhanced_text = enhanced_text
+    enhancement.chunks = chunks
+    enhancement.error = error[:255]
+    enhancement.status = "failed" if error else "done"
+    enhancement.finished_at = timezone.now()
+    enhancement.save(update_fields=["enhanced_text", "chunks", "error", "status", "finished_at"])
+
+    _push(f"enhance_{enhancement_id}", {
+        "type": "enhance.done",
+        "status": enhancement.status,
+        "enhanced_text": enhancement.enhanced_text,
+        "error": enhancement.error,
+    })
@@ -0,0 +1,71 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+# start seconds, end seconds, first char, one past last char
+COLUMN_TYPES = ("f", "f", "I", "I")
+
+
+def _pack(columns):
+    return b"".join(column.tobytes() for column in columns)
+
+
+def unpack(blob):
+    """ Splits a packed blob back into its four equal-length columns. """
+    blob = bytes(blob or b"")
+    count = len(blob) // sum(array(t).itemsize for t in COLUMN_TYPES)
+    columns, offset = [], 0
+    for typecode in COLUMN_TYPES:
+        column = array(typecode)
+        size = count * column.itemsize
+        column.frombytes(blob[offset:offset + size])
+        columns.append(column)
+        offset += size
+    return columns
+
+
+def build_index(segments):
+    """
+    Joins ordered Whisper segments into one transcript and returns
+    (transcript, packed segment columns, packed word columns). Character
+    offsets point into the returned transcript.
+    """
+    seg_cols = [array(t) for t in COLUMN_TYPES]
+    word_cols = [array(t) for t in COLUMN_TYPES]
+    parts = []
+    position = 0
+
+    for seg in segments:
+        text = seg["text"]
+        if not text:
+            continue
+        if parts:
+            position += 1
+
+        cursor = 0
+        for word in seg.get("words", []):
+            token = word["word"].strip()
+            found = text.find(token, cursor) if token else -1
+            if found < 0:
+                continue
+            for column, value in zip(word_cols, (word["start"], word["end"], position + found, position + found + len(token))):
+                column.append(value)
+            cursor = found + len(token)
+
+        for column, value in zip(seg_cols, (seg["start"], seg["end"], position, position + len(text))):
+            column.append(value)
+
+        parts.append(text)
+        position += len(text)
+
+    return " ".join(parts), _pack(seg_cols), _pack(word_cols)
+
+
+def lookup(blob, start, end):
+    """ Entries overlapping [start, end) seconds as (start, end, char_start, char_end) tuples. """
+    starts, ends, char_starts, char_ends = unpack(blob)
+    first = bisect_right(ends, start)
+    last = bisect_left(starts, end)
+    return [
+        (starts[i], ends[i], char_starts[i], char_ends[i])
+        for i in range(first, max(first, last))
+    ]
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import uuid
+from django.conf import settings
+from django.db import transaction
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers, StopUpload
+from .models import UploadTranscription, UploadTranscriptSegment, TranscriptIndex
+from .tasks import dispatch_transcriptions
+from .engines import engine_version
+
+UPLOAD_DIR = "upload_transcription_files"
+ALLOWED_TYPE_PREFIXES = ("audio/", "video/")
+
+
+def partial_dir():
+    path = os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR, "partial")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def is_allowed_type(content_type):
+    return bool(content_type) and content_type.startswith(ALLOWED_TYPE_PREFIXES)
+
+
+class StreamingUploadHandler(FileUploadHandler):
+    """
+    Takes over file parts of a multipart body: checks the declared type up front,
+    then hashes and writes each chunk to a partial file in one pass. Under ASGI
+    the body is already on disk by now (UploadSizeLimitMiddleware caps it before
+    that); the size check here still guards WSGI and the file part itself.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = settings.TRANSCRIPTION_MAX_UPLOAD_SIZE
+        self.error = None
+        self.hashes = {}
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        if not is_allowed_type(content_type):
+            self.error = (415, "Only audio or video files can be transcribed")
+            raise StopUpload(connection_reset=True)
+
+        self._sha256 = hashlib.sha256()
+        self._size = 0
+        self._path = os.path.join(partial_dir(), f"{uuid.uuid4()}.part")
+        self._file = open(self._path, "wb")
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._size += len(raw_data)
+        if self._size > self.max_size:
+            self._discard()
+            self.error = (413, f"Max file size is {self.max_size // (1024 * 1024)}MB")
+            raise StopUpload(connection_reset=True)
+
+        self._sha256.update(raw_data)
+        self._file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        self._file.close()
+        self.hashes[self.field_name] = self._sha256.hexdigest()
+        upload = UploadedFile(
+            file=open(self._path, "rb"),
+            name=self.file_name,
+            content_type=self.content_type,
+            size=self._size,
+            charset=self.charset,
+        )
+        upload.temporary_path = self._path
+        return upload
+
+    def upload_interrupted(self):
+        self._discard()
+
+    def _discard(self):
+        file = getattr(self, "_file", None)
+        if file and not file.closed:
+            file.close()
+        if getattr(self, "_path", None) and os.path.exists(self._path):
+            os.remove(self._path)
+
+
+def session_path(session):
+    """ Where a resumable UploadSession accumulates its bytes. """
+    return os.path.join(partial_dir(), f"{session.id}.part")
+
+
+def hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def content_addressed_name(content_hash, original_name):
+    """ Same bytes, same storage name; the extension is kept so ffmpeg can sniff the format. """
+    _, ext = os.path.splitext(original_name)
+    return f"{UPLOAD_DIR}/{content_hash}{ext.lower()}"
+
+
+def create_upload(user, partial_path, original_name, content_hash):
+    """
+    Turns a fully received partial file into an UploadTranscription. Identical bytes
+    share one stored file, and a finished transcript for the same model is reused.
+    """
+    model_version = engine_version()
+    media = UploadTranscription(user=user, content_hash=content_hash, model_version=model_version)
+
+    stored = UploadTranscription.objects.filter(content_hash=content_hash).exclude(file="").first()
+    if stored:
+        media.file.name = stored.file.name
+        os.remove(partial_path)
+    else:
+        name = content_addressed_name(content_hash, original_name)
+        # Same filesystem, so this is a rename rather than a copy
+        os.replace(partial_path, os.path.join(settings.MEDIA_ROOT, name))
+        media.file.name = name
+
+    cached = (
+        UploadTranscription.objects
+        .filter(content_hash=content_hash, model_version=model_version, status="done")
+        .first()
+    )
+    if cached:
+        media.transcript = cached.transcript
+        media.status = "done"
+        media.segments_total = media.segments_done = cached.segments_total
+        media.save()
+        UploadTranscriptSegment.objects.bulk_create([
+            UploadTranscriptSegment(upload=media, chunk=seg.chunk, start=seg.start, end=seg.end, text=seg.text)
+            for seg in cached.segments.all()
+        ])
+        cached_index = TranscriptIndex.objects.filter(upload=cached).first()
+        if cached_index:
+            TranscriptIndex.objects.create(upload=media, segments=cached_index.segments, words=cached_index.words)
+        return media
+
+    media.save()
+    # Let the fair scheduler decide when this starts
+    transaction.on_commit(dispatch_transcriptions.delay)
+    return media
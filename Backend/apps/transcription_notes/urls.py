@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import LiveTranscriptionView, NoteCreateView, NotesView, NoteDetailView, NoteUpdateView, MediaUploadView, MediaDetailView, EnhanceNoteView
+from .views import LiveTranscriptionView, NoteCreateView, NotesView, NoteDetailView, NoteTranscriptRangeView, NoteUpdateView, MediaUploadView, MediaDetailView, EnhanceNoteView, EnhanceNoteResultView, UploadSessionCreateView, UploadSessionView
 
 urlpatterns = [
     path("start/", LiveTranscriptionView.as_view()),
@@ -7,7 +7,11 @@ urlpatterns = [
     path('notes/',NotesView.as_view(),name='NotesView'),
     path('notes-update/<uuid:pk>/',NoteUpdateView.as_view(),name='NotesView'),
     path("notes/<uuid:pk>/", NoteDetailView.as_view()),
+    path("notes/<uuid:pk>/range/", NoteTranscriptRangeView.as_view()),
     path("upload/", MediaUploadView.as_view()),
+    path("upload/sessions/", UploadSessionCreateView.as_view()),
+    path("upload/sessions/<uuid:pk>/", UploadSessionView.as_view()),
     path("media/<int:pk>/", MediaDetailView.as_view()),
     path("enhance/", EnhanceNoteView.as_view()),
+    path("enhance/<uuid:pk>/", EnhanceNoteResultView.as_view()),
 ]
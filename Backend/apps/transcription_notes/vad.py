@@ -0,0 +1,117 @@
+import numpy as np
+from .audio import SAMPLE_RATE
+
+FRAME_SECONDS = 0.03
+FRAME_SAMPLES = int(FRAME_SECONDS * SAMPLE_RATE)
+
+
+class EnergyVad:
+    """ Frame RMS against an adaptive noise floor. Cheap enough to run on every chunk. """
+
+    def __init__(self, ratio=3.0, min_rms=0.005):
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.noise = None
+
+    def process(self, audio):
+        """ Returns one speech flag per 30 ms frame; trailing samples are ignored. """
+        count = len(audio) // FRAME_SAMPLES
+        frames = audio[:count * FRAME_SAMPLES].reshape(count, FRAME_SAMPLES)
+        rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+
+        flags = np.zeros(count, dtype=bool)
+        for i, energy in enumerate(rms):
+            if self.noise is None:
+                self.noise = energy
+            if energy > max(self.noise * self.ratio, self.min_rms):
+                flags[i] = True
+                # Let the floor creep up so a louder room does not read as speech forever
+                self.noise *= 1.002
+            else:
+                self.noise = 0.95 * self.noise + 0.05 * energy
+        return flags
+
+
+class SpeechGate:
+    """
+    Decides, per live update, whether new audio is worth sending to Whisper.
+    advance() returns:
+      ("silence", None)  nothing spoken since the last utterance ended
+      ("speech", None)   an utterance is still going
+      ("boundary", t)    the utterance ended at session time t
+    """
+
+    def __init__(self, min_silence=0.6, pad=0.2):
+        self.vad = EnergyVad()
+        self.min_silence = min_silence
+        self.pad = pad
+        self.analysed_until = 0.0
+        self.in_speech = False
+        self.last_speech = 0.0
+        self.skipped_seconds = 0.0
+        self.processed_seconds = 0.0
+
+    def advance(self, pcm):
+        start, audio = pcm.since(self.analysed_until)
+        flags = self.vad.process(audio)
+        if not len(flags):
+            return ("speech" if self.in_speech else "silence"), None
+
+        self.analysed_until = start + len(flags) * FRAME_SECONDS
+
+        if flags.any():
+            last = np.flatnonzero(flags)[-1]
+            self.last_speech = start + (last + 1) * FRAME_SECONDS
+            self.in_speech = True
+
+        if not self.in_speech:
+            self.skipped_seconds += len(flags) * FRAME_SECONDS
+            return "silence", None
+
+        if self.analysed_until - self.last_speech >= self.min_silence:
+            self.in_speech = False
+            return "boundary", min(self.last_speech + self.pad, self.analysed_until)
+
+        return "speech", None
+
+    def mark_processed(self, seconds):
+        self.processed_seconds += seconds
+
+    @property
+    def stats(self):
+        return {
+            "skipped_seconds": round(self.skipped_seconds, 1),
+            "processed_seconds": round(self.processed_seconds, 1),
+        }
+
+
+def split_at_silence(audio, target=300.0, search=30.0):
+    """
+    Cuts a long recording into roughly `target`-second (start, end) spans,
+    placing each cut in the middle of the longest pause near the ideal point.
+    """
+    flags = EnergyVad().process(audio)
+    total = len(audio) / SAMPLE_RATE
+    cuts = [0.0]
+
+    while total - cuts[-1] > target + search:
+        ideal = cuts[-1] + target
+        lo = int((ideal - search) / FRAME_SECONDS)
+        hi = int((ideal + search) / FRAME_SECONDS)
+
+        best_start, best_len, run_start = None, 0, None
+        for i, speech in enumerate(list(flags[lo:hi]) + [True]):
+            if not speech and run_start is None:
+                run_start = i
+            elif speech and run_start is not None:
+                if i - run_start > best_len:
+                    best_start, best_len = run_start, i - run_start
+                run_start = None
+
+        if best_start is None:
+            cuts.append(ideal)
+        else:
+            cuts.append((lo + best_start + best_len / 2) * FRAME_SECONDS)
+
+    cuts.append(total)
+    return list(zip(cuts[:-1], cuts[1:]))
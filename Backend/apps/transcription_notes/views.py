@@ -1,3 +1,6 @@
+import os
+import logging
+from datetime import timedelta
 from rest_framework.views import APIView
 from rest_framework.generics import RetrieveAPIView, RetrieveUpdateAPIView
 from rest_framework.permissions import IsAuthenticated
@@ -6,12 +9,17 @@ from rest_framework import status
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 from rest_framework.parsers import MultiPartParser, FormParser
-from .tasks import transcribe_media
-from apps.chat_bot.gemini_service import call_gemini
+from django.conf import settings
+from .uploads import StreamingUploadHandler, create_upload, hash_file, is_allowed_type, session_path
+from django.db import transaction
+from .tasks import enhance_note
 
-from .models import Notes,LiveTranscription, UploadTranscription
+from .models import Notes,LiveTranscription, UploadTranscription, UploadSession, TranscriptIndex, NoteEnhancement
+from .transcript_index import lookup
 from .serializers import TranscriptionCreateSerializer, NotesSerializer, MediaUploadSerializer, NoteCreateSerializer
 
+logger = logging.getLogger(__name__)
+
 
 class LiveTranscriptionView(APIView):
     permission_classes = [IsAuthenticated]
@@ -97,6 +105,51 @@ class NoteDetailView(RetrieveAPIView):
     def get_queryset(self):
         return Notes.objects.filter(user=self.request.user)
     
+class NoteTranscriptRangeView(APIView):
+    """
+    Transcript text for a time window of an uploaded note, e.g.
+    GET notes/<id>/range/?start=600&end=660&level=word
+    Offsets refer to the upload's original transcript, not later note edits.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        note = get_object_or_404(Notes, id=pk, user=request.user)
+        index = TranscriptIndex.objects.filter(upload_id=note.upload_source_id).select_related("upload").first()
+        if not index:
+            return Response(
+                {"error": "No timing index for this note"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            start = float(request.query_params.get("start", 0))
+            end = float(request.query_params.get("end", start + 60))
+        except ValueError:
+            return Response({"error": "start and end must be seconds"}, status=status.HTTP_400_BAD_REQUEST)
+
+        level = request.query_params.get("level", "segment")
+        entries = lookup(index.words if level == "word" else index.segments, start, end)
+        transcript = index.upload.transcript or ""
+
+        if not entries:
+            return Response({"start": start, "end": end, "text": "", "items": []})
+
+        return Response({
+            "start": round(entries[0][0], 2),
+            "end": round(entries[-1][1], 2),
+            "text": transcript[entries[0][2]:entries[-1][3]],
+            "items": [
+                {
+                    "start": round(item_start, 2),
+                    "end": round(item_end, 2),
+                    "char_start": char_start,
+                    "char_end": char_end,
+                }
+                for item_start, item_end, char_start, char_end in entries
+            ],
+        })
+
 class NoteUpdateView(RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = NotesSerializer
@@ -105,15 +158,141 @@ class NoteUpdateView(RetrieveUpdateAPIView):
         return Notes.objects.filter(user=self.request.user)
     
 class MediaUploadView(APIView):
+    permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)
 
+    def initialize_request(self, request, *args, **kwargs):
+        # Must be installed before the body is parsed
+        self.uploader = StreamingUploadHandler(request)
+        request.upload_handlers.insert(0, self.uploader)
+        return super().initialize_request(request, *args, **kwargs)
+
     def post(self, request):
+        max_size = settings.TRANSCRIPTION_MAX_UPLOAD_SIZE
+
+        # Declared body size already over the limit (plus multipart overhead). Under ASGI the
+        # middleware has refused this already; this covers WSGI
+        if int(request.META.get("CONTENT_LENGTH") or 0) > max_size + 64 * 1024:
+            return Response(
+                {"file": [f"Max file size is {max_size // (1024 * 1024)}MB"]},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
         serializer = MediaUploadSerializer(data=request.data)
-        if serializer.is_valid():
-            media = serializer.save(user=request.user)
-            transcribe_media.delay(media.id)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        if self.uploader.error:
+            code, message = self.uploader.error
+            return Response({"file": [message]}, status=code)
+
+        if not serializer.is_valid():
+            for upload in request.FILES.values():
+                upload.close()
+                if os.path.exists(upload.temporary_path):
+                    os.remove(upload.temporary_path)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = serializer.validated_data["file"]
+        upload.close()
+        media = create_upload(request.user, upload.temporary_path, upload.name, self.uploader.hashes["file"])
+        return Response(MediaUploadSerializer(media).data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        file_name = request.data.get("file_name")
+        content_type = request.data.get("content_type")
+        try:
+            size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            size = 0
+
+        if not file_name or size <= 0:
+            return Response(
+                {"error": "file_name and size are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not is_allowed_type(content_type):
+            return Response(
+                {"error": "Only audio or video files can be transcribed"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        max_size = settings.TRANSCRIPTION_MAX_UPLOAD_SIZE
+        if size > max_size:
+            return Response(
+                {"error": f"Max file size is {max_size // (1024 * 1024)}MB"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        session = UploadSession.objects.create(
+            user=request.user,
+            file_name=file_name,
+            content_type=content_type,
+            size=size,
+        )
+        open(session_path(session), "wb").close()
+
+        return Response(
+            {"id": session.id, "received": 0, "size": session.size},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class UploadSessionView(APIView):
+    """
+    Resumable upload: PUT raw bytes with `Content-Range: bytes <start>-<end>/<size>`,
+    where <start> must equal the `received` offset GET reports.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        session = get_object_or_404(UploadSession, id=pk, user=request.user)
+        return Response({"id": session.id, "received": session.received, "size": session.size})
+
+    def put(self, request, pk):
+        session = get_object_or_404(UploadSession, id=pk, user=request.user)
+
+        content_range = request.META.get("HTTP_CONTENT_RANGE", "")
+        try:
+            start = int(content_range.split()[1].split("-")[0])
+        except (IndexError, ValueError):
+            return Response({"error": "Content-Range header required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if start != session.received:
+            return Response({"received": session.received}, status=status.HTTP_409_CONFLICT)
+
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+        if start + length > session.size:
+            return Response({"error": "Chunk goes past the declared size"}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        # Stream the body straight to disk; a retried chunk simply overwrites the same range
+        written = 0
+        with open(session_path(session), "r+b") as f:
+            f.seek(start)
+            while written < length:
+                block = request.stream.read(min(64 * 1024, length - written))
+                if not block:
+                    break
+                f.write(block)
+                written += len(block)
+
+        updated = UploadSession.objects.filter(id=session.id, received=start).update(received=start + written)
+        if not updated:
+            session.refresh_from_db()
+            return Response({"received": session.received}, status=status.HTTP_409_CONFLICT)
+
+        session.received = start + written
+        if session.received < session.size:
+            return Response({"id": session.id, "received": session.received, "size": session.size})
+
+        # Chunks may have come in through different workers, so the hash is taken once over the whole file
+        path = session_path(session)
+        media = create_upload(request.user, path, session.file_name, hash_file(path))
+        session.delete()
+        return Response(MediaUploadSerializer(media).data, status=status.HTTP_201_CREATED)
 
 class MediaDetailView(APIView):
     def get(self, request, pk):
@@ -121,19 +300,56 @@ class MediaDetailView(APIView):
         return Response(MediaUploadSerializer(media).data)
 
 
-from asgiref.sync import async_to_sync
-
 class EnhanceNoteView(APIView):
+    """ Queues a Gemini clean-up of the transcript; the result arrives on ws/enhance/<id>/ or via GET. """
     permission_classes = [IsAuthenticated]
-    def post(self,request):
+
+    def post(self, request):
         transcript_content = request.data.get('transcript')
-        if not transcript_content:
+        if not transcript_content or not transcript_content.strip():
             return Response({"error": "No transcript provided"}, status=status.HTTP_400_BAD_REQUEST)
-            
-        prompt = f"Enhance this transcribed data. Fix the grammatical errors, keep the same context, but highly correct it and format it cleanly:\n\n{transcript_content}"
-        
-        response = async_to_sync(call_gemini)(prompt)
+
+        active = NoteEnhancement.objects.filter(user=request.user, status__in=["pending", "processing"])
+        # A job that never finished (worker died, never queued) must not hold a slot forever
+        active.filter(created_at__lte=now() - timedelta(seconds=settings.ENHANCE_JOB_TIMEOUT)).update(
+            status="failed",
+            error="Enhancement timed out",
+            finished_at=now(),
+        )
+        if active.count() >= settings.ENHANCE_MAX_ACTIVE:
+            return Response(
+                {"error": "An enhancement is already running, please wait for it to finish"},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+        enhancement = NoteEnhancement.objects.create(user=request.user, source_text=transcript_content)
+
+        def queue():
+            try:
+                enhance_note.delay(str(enhancement.id))
+            except Exception as e:
+                logger.error(f"Could not queue note enhancement {enhancement.id}: {e}")
+                NoteEnhancement.objects.filter(id=enhancement.id).update(
+                    status="failed",
+                    error="Could not start the enhancement, please try again",
+                    finished_at=now(),
+                )
+
+        transaction.on_commit(queue)
         return Response(
-            {"reply": response},
-            status=status.HTTP_200_OK
-        )
\ No newline at end of file
+            {"id": enhancement.id, "status": enhancement.status},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class EnhanceNoteResultView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        enhancement = get_object_or_404(NoteEnhancement, pk=pk, user=request.user)
+        return Response({
+            "id": enhancement.id,
+            "status": enhancement.status,
+            "enhanced_text": enhancement.enhanced_text,
+            "error": enhancement.error,
+        })
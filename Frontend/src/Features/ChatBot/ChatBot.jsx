@@ -32,7 +32,7 @@ export default function ChatPage() {
 
     const fetchData = async () => {
         try {
-            const result = await dispatch(FetchChatBot()).unwrap();
+            const result = await dispatch(FetchChatBot(noteId)).unwrap();
             const formattedMessages = result.flatMap((msg) => [
                 { role: "user", text: msg.question },
                 { role: "bot", text: msg.answer },
@@ -79,13 +79,25 @@ export default function ChatPage() {
                 setMessages(prev => prev.slice(0, -1));
                 return;
             }
-            const incomingText = data.reply || data.message || "";
+
+            // Reply arrives as delta frames, then one final frame with the full text once credits are settled
+            if (data.type === "delta") {
+                setMessages((prev) => {
+                    const last = prev[prev.length - 1];
+                    if (last && last.role === "bot" && last.streaming) {
+                        return [...prev.slice(0, -1), { ...last, text: last.text + data.delta }];
+                    }
+                    return [...prev, { role: "bot", text: data.delta, streaming: true }];
+                });
+                return;
+            }
+
+            // Final text replaces the streamed one; an error replaces whatever partial reply was shown
+            const incomingText = data.type === "final" ? data.reply : data.message || "";
             setMessages((prev) => {
                 const last = prev[prev.length - 1];
-                if (last && last.role === "bot") {
-                    return [...prev.slice(0, -1), { role: "bot", text: last.text + incomingText }];
-                }
-                return [...prev, { role: "bot", text: incomingText }];
+                const base = last && last.streaming ? prev.slice(0, -1) : prev;
+                return [...base, { role: "bot", text: incomingText }];
             });
         };
 
@@ -102,10 +114,10 @@ export default function ChatPage() {
 
         if (socket.current && socket.current.readyState === WebSocket.OPEN) {
             socket.current.send(
+                // The server looks the note up and picks the relevant passages itself
                 JSON.stringify({
                     message: input,
-                    context: noteContent,
-                    note_title: noteTitle
+                    note_id: noteId || null
                 })
             );
         }
@@ -45,19 +45,57 @@ export default function LiveTranscriptionPage() {
     const [editedTranscript, setEditedTranscript] = useState("");
     const [selectedFileId, SetSelectedFileId] = useState(null);
     const [isEnhancing, setIsEnhancing] = useState(false);
+    const [uploadProgress, setUploadProgress] = useState(0);
+    const [updateInterval, setUpdateInterval] = useState(null);
 
     const socketRef = useRef(null);
+    const committedRef = useRef("");
     const mediaRecorderRef = useRef(null);
     const streamRef = useRef(null);
 
     useEffect(() => {
-        const socket = new WebSocket("wss://api.eduflow.muhammedshan.info/ws/live-transcribe/");
+        // Reconnects resume the server-side session from its last checkpoint
+        const sessionId = sessionStorage.getItem("liveSessionId");
+        const socket = new WebSocket(`wss://api.eduflow.muhammedshan.info/ws/live-transcribe/${sessionId ? `?session=${sessionId}` : ""}`);
         socketRef.current = socket;
 
         socket.onmessage = (event) => {
             const data = JSON.parse(event.data);
-            if (!data.text) return;
-            setTranscript(data.text);
+
+            if (data.type === "session") {
+                sessionStorage.setItem("liveSessionId", data.id);
+                committedRef.current = data.transcript?.trim() || "";
+                if (committedRef.current) {
+                    setTranscript(committedRef.current);
+                    setShowTranscript(true);
+                }
+                return;
+            }
+
+            if (data.type === "closed") {
+                sessionStorage.removeItem("liveSessionId");
+                setNoteId(data.note_id);
+                setNoteSaved(true);
+                return;
+            }
+
+            if (data.type === "error") {
+                alert(data.message);
+                return;
+            }
+
+            // Server widens this under load and tightens it when idle
+            if (data.type === "cadence") {
+                setUpdateInterval(data.interval);
+                return;
+            }
+
+            if (data.type !== "transcript") return;
+            // Server sends newly committed text plus the still-changing tail
+            if (data.commit) {
+                committedRef.current = [committedRef.current, data.commit].filter(Boolean).join(" ");
+            }
+            setTranscript([committedRef.current, data.tentative].filter(Boolean).join(" "));
         };
 
         socket.onerror = (err) => {
@@ -120,24 +158,47 @@ export default function LiveTranscriptionPage() {
         }
     };
 
-    const pollForTranscript = (mediaId) => {
-        const interval = setInterval(async () => {
-            try {
-                const res = await api.get(`/transcription-notes/media/${mediaId}/`);
-                const data = res.data;
+    const watchTranscript = (mediaId) => {
+        const socket = new WebSocket(`wss://api.eduflow.muhammedshan.info/ws/upload-transcription/${mediaId}/`);
+        // Segments arrive per chunk and chunks can finish out of order
+        const chunks = {};
+        const render = () => Object.keys(chunks)
+            .sort((a, b) => a - b)
+            .map((k) => chunks[k].map((s) => s.text).join(" "))
+            .join(" ");
 
-                if (data.status === "done") {
-                    setTranscript(data.transcript);
-                    setShowTranscript(true);
-                    setIsProcessing(false);
-                    clearInterval(interval);
-                }
-            } catch (err) {
-                console.error(err);
+        socket.onmessage = (event) => {
+            const data = JSON.parse(event.data);
+
+            if (data.type === "snapshot" || data.type === "segments") {
+                const segments = data.type === "snapshot" ? data.segments : data.segments.map((s) => ({ ...s, chunk: data.chunk }));
+                if (data.type === "segments") chunks[data.chunk] = [];
+                segments.forEach((s) => {
+                    chunks[s.chunk] = chunks[s.chunk] || [];
+                    chunks[s.chunk].push(s);
+                });
+                setUploadProgress(data.progress);
+                setTranscript(render());
+            }
+
+            if (data.type === "done" || (data.type === "snapshot" && data.status === "done")) {
+                setTranscript(data.transcript);
+                setUploadProgress(100);
+                setIsProcessing(false);
+                socket.close();
+            }
+
+            if (data.type === "failed" || (data.type === "snapshot" && data.status === "failed")) {
+                alert(data.message || "Transcription failed. Please try uploading the file again.");
                 setIsProcessing(false);
-                clearInterval(interval);
+                socket.close();
             }
-        }, 5000);
+        };
+
+        socket.onerror = (err) => {
+            console.error(err);
+            setIsProcessing(false);
+        };
     };
 
     const handleFileUpload = async () => {
@@ -146,6 +207,7 @@ export default function LiveTranscriptionPage() {
         setIsProcessing(true);
         setShowTranscript(true);
         setTranscript("");
+        setUploadProgress(0);
 
         const form = new FormData();
         form.append("file", selectedFile);
@@ -154,7 +216,7 @@ export default function LiveTranscriptionPage() {
             const action = await dispatch(UploadTranscription(form));
             const mediaId = action.payload.id
             SetSelectedFileId(mediaId)
-            pollForTranscript(mediaId);
+            watchTranscript(mediaId);
         } catch (err) {
             console.error(err);
             setIsProcessing(false);
@@ -171,6 +233,13 @@ export default function LiveTranscriptionPage() {
     };
 
     const HandleSaveNote = async () => {
+        // Live notes are written by the server, which closes the session; the text is
+        // what the user sees, so edits and enhancements are kept
+        if (activeTab === "live" && socketRef.current?.readyState === WebSocket.OPEN) {
+            socketRef.current.send(JSON.stringify({ action: "close", title: noteTitle, transcript_text: transcript }));
+            return;
+        }
+
         const payload = {
             type: activeTab === "live" ? "live" : "file",
             title: noteTitle,
@@ -291,6 +360,11 @@ export default function LiveTranscriptionPage() {
                             <p className="text-lg font-medium text-gray-700 dark:text-slate-200">
                                 {isRecording ? "Listening…" : isProcessing ? "Processing last audio…" : "Ready to record"}
                             </p>
+                            {isRecording && updateInterval && (
+                                <p className="text-sm text-gray-500 dark:text-slate-400">
+                                    Updating every {updateInterval}s
+                                </p>
+                            )}
                             {!isRecording ? (
                                 <button onClick={startRecording} className="inline-flex items-center gap-2 bg-gradient-to-r from-purple-500 to-purple-700 text-white px-8 py-3 rounded-lg font-semibold hover:scale-105 transition">
                                     <Play size={20} /> Start Live Note
@@ -333,7 +407,7 @@ export default function LiveTranscriptionPage() {
                                 onClick={handleFileUpload}
                                 className={`inline-flex items-center gap-2 px-10 py-3 rounded-lg font-semibold transition ${selectedFile && !isProcessing ? "bg-purple-600 text-white hover:bg-purple-700 hover:scale-105" : "bg-gray-200 dark:bg-slate-700 text-gray-400 dark:text-slate-500 cursor-not-allowed"}`}
                             >
-                                {isProcessing ? "Processing..." : "Transcribe File"}
+                                {isProcessing ? `Processing... ${uploadProgress}%` : "Transcribe File"}
                             </button>
                         </div>
                     )}
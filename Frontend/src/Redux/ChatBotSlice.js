@@ -4,9 +4,10 @@ import { showNotification } from "./NotificationSlice";
 
 export const FetchChatBot = createAsyncThunk(
     'ChatBot/FetchChatBot',
-    async(_,{rejectWithValue}) => {
+    async(noteId,{rejectWithValue}) => {
         try {
-            const response = await api.get('/chat-bot/');
+            // Each note has its own conversation; without one it is the general chat
+            const response = await api.get('/chat-bot/', { params: noteId ? { note_id: noteId } : {} });
             console.log(response.data);
             return response.data
         } catch(err) {
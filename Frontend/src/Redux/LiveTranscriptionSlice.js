@@ -197,6 +197,55 @@ export const UploadTranscription = createAsyncThunk(
     }
 );
 
+// Enhancement runs in the background; the server pushes the result, polling covers a dropped socket
+// or a missed push, and the server gives a job up as failed after 15 minutes
+const ENHANCE_POLL_AFTER_MS = 15000;
+const ENHANCE_TIMEOUT_MS = 16 * 60 * 1000;
+
+const waitForEnhancement = (id) => new Promise((resolve, reject) => {
+    let settled = false;
+    let poller = null;
+    const socket = new WebSocket(`wss://api.eduflow.muhammedshan.info/ws/enhance/${id}/`);
+
+    const settle = () => {
+        if (settled) return false;
+        settled = true;
+        clearInterval(poller);
+        clearTimeout(backstop);
+        clearTimeout(deadline);
+        socket.close();
+        return true;
+    };
+    const finish = (result) => {
+        if (settle()) resolve(result);
+    };
+    const fail = (err) => {
+        if (settle()) reject(err);
+    };
+
+    socket.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data.type === 'done') finish(data);
+    };
+
+    const poll = async () => {
+        try {
+            const response = await api.get(`/transcription-notes/enhance/${id}/`);
+            if (['done', 'failed'].includes(response.data.status)) finish(response.data);
+        } catch (err) {
+            fail(err);
+        }
+    };
+    const startPolling = () => {
+        if (!settled && !poller) poller = setInterval(poll, 3000);
+    };
+
+    socket.onerror = startPolling;
+    socket.onclose = startPolling;
+    const backstop = setTimeout(startPolling, ENHANCE_POLL_AFTER_MS);
+    const deadline = setTimeout(() => fail(new Error('Enhancement timed out')), ENHANCE_TIMEOUT_MS);
+});
+
 export const EnhanceNote = createAsyncThunk(
     "liveTranscription/EnhanceNote",
     async (data, { dispatch, rejectWithValue }) => {
@@ -205,11 +254,15 @@ export const EnhanceNote = createAsyncThunk(
                 '/transcription-notes/enhance/',
                 data
             );
+            const result = await waitForEnhancement(response.data.id);
+            if (result.status === 'failed') {
+                throw new Error(result.error || 'Enhancement failed');
+            }
             dispatch(showNotification({
                 message: 'enhanced successfully',
                 type: 'success',
             }));
-            return response.data.reply;
+            return { enhanced_text: result.enhanced_text };
         } catch (err) {
             const errorMessage =
                 err.response?.data?.error ||